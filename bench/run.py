@@ -0,0 +1,421 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+run.py
+
+Headless and offline benchmarks of ksigner hot paths: hashing files
+(`Signer.hash_file`), verifying signatures (`Verifyer.verify`), printing
+QR codes (`make_qr_code`, built or from its cache) and building QR code textures
+(`make_qr_texture_buffer`, used by `QRCodeScreen._update_texture`).
+
+No camera, no Krux device and no window are needed: synthetic files are
+generated with random data, and signatures with a random secp256k1 key.
+
+Every case runs in a fresh python process, so its peak RSS can be measured.
+Results can be saved as a JSON baseline and compared with a later run,
+flagging regressions above a threshold.
+
+Usage:
+------
+
+    python bench/run.py
+    python bench/run.py --max-size 8G --save baseline.json
+    python bench/run.py --max-size 8G --compare baseline.json
+"""
+####################
+# Standard libraries
+####################
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Get root path of ksigner to import its modules
+ROOT_PATH = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(ROOT_PATH / "src"))
+
+SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+FILE_SIZES = ("1K", "1M", "64M", "1G", "8G")
+FILE_CASES = ("hash_file", "verify")
+QR_CASES = ("make_qr_code", "make_qr_code_cached", "qr_texture", "qr_luminance")
+QR_PAYLOADS = {"sha256": 64, "large": 2048}
+
+
+def parse_size(text) -> int:
+    """
+    Convert a human size like '64M' to bytes
+    """
+    unit = text[-1].upper()
+    if unit in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[unit])
+    return int(text)
+
+
+def peak_rss() -> int:
+    """
+    Peak resident set size, in bytes, of current
+    process, or :data:`None` if not available (Windows)
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        import resource
+    except ImportError:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux gives kilobytes, macos gives bytes
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def make_file(directory, size_name) -> str:
+    """
+    Create (once) a file of random data
+    with the given size inside directory
+    """
+    size = parse_size(size_name)
+    path = os.path.join(directory, f"bench-{size_name}.bin")
+
+    if os.path.isfile(path) and os.path.getsize(path) == size:
+        return path
+
+    print(f"Generating {path}...", file=sys.stderr)
+    chunk = 1024 * 1024
+    with open(path, "wb") as f_data:
+        written = 0
+        while written < size:
+            block = os.urandom(min(chunk, size - written))
+            f_data.write(block)
+            written += len(block)
+    return path
+
+
+def make_key(directory) -> tuple:
+    """
+    Create (once) a random secp256k1 key, saving its public
+    PEM in directory. Return the private key and PEM path
+    """
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    key = ec.generate_private_key(ec.SECP256K1())
+    pem = os.path.join(directory, "bench.pem")
+    with open(pem, "wb") as f_pem:
+        f_pem.write(
+            key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+    return key, pem
+
+
+def sign_file(key, path) -> str:
+    """
+    Sign a file with the private key, like Krux does with
+    its sha256 digest, returning the `.sig` path
+    """
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+    hash_obj = hashlib.sha256()
+    with open(path, "rb") as f_data:
+        for block in iter(lambda: f_data.read(1024 * 1024), b""):
+            hash_obj.update(block)
+
+    signature = f"{path}.sig"
+    with open(signature, "wb") as f_sig:
+        f_sig.write(key.sign(hash_obj.digest(), ec.ECDSA(Prehashed(hashes.SHA256()))))
+    return signature
+
+
+def make_payload(name) -> str:
+    """
+    Deterministic QR payload with a known length
+    """
+    size = QR_PAYLOADS[name]
+    digest = hashlib.sha256(name.encode()).hexdigest()
+    return (digest * (size // len(digest) + 1))[:size]
+
+
+# ksigner modules are found at runtime through sys.path
+# pylint: disable=import-outside-toplevel,import-error
+def make_case(case, target, pubkey):
+    """
+    Prepare a case, returning the function to be timed
+    """
+    if case == "hash_file":
+        from cli.signer import Signer
+
+        def func():
+            Signer(file=target).hash_file()
+
+    elif case == "verify":
+        from cli.verifyer import Verifyer
+
+        def func():
+            verifyer = Verifyer(
+                file=target, signature=f"{target}.sig", pubkey=pubkey, verbose=False
+            )
+            verifyer.build()
+            verifyer.verify()
+            if not verifyer.verified:
+                raise RuntimeError(f"Invalid signature for {target}")
+
+    elif case == "make_qr_code":
+        from utils.qr import make_qr_code, _cached_qr_ascii, _cached_qr_matrix
+
+        payload = make_payload(target)
+
+        # measure building the QR code, not a hit of its cache
+        # (see `make_qr_code_cached`)
+        def func():
+            _cached_qr_ascii.cache_clear()
+            _cached_qr_matrix.cache_clear()
+            make_qr_code(data=payload)
+
+    elif case == "make_qr_code_cached":
+        from utils.qr import make_qr_code
+
+        payload = make_payload(target)
+        make_qr_code(data=payload)
+
+        def func():
+            make_qr_code(data=payload)
+
+    elif case in ("qr_texture", "qr_luminance"):
+        from qrcode import QRCode
+        from utils.qr import make_qr_texture_buffer
+
+        qr_code = QRCode()
+        qr_code.add_data(make_payload(target))
+        qr_code.make(fit=True)
+        matrix = qr_code.get_matrix()
+
+        colorfmt = "luminance" if case == "qr_luminance" else "rgb"
+
+        def func():
+            make_qr_texture_buffer(
+                matrix=matrix, color=(255, 255, 255), colorfmt=colorfmt
+            )
+
+    else:
+        raise ValueError(f"Invalid case '{case}'")
+
+    return func
+
+
+def run_case(case, target, repeat, pubkey) -> dict:
+    """
+    Run a case :data:`repeat` times in this process (the worker),
+    returning the seconds of each run and the peak RSS
+    """
+    func = make_case(case, target, pubkey)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    return {"seconds": seconds, "peak_rss": peak_rss()}
+
+
+def spawn_case(case, target, repeat, pubkey) -> dict:
+    """
+    Run a case in a fresh python process
+    """
+    cmd = [sys.executable, __file__, "--worker", case, target, str(repeat)]
+    if pubkey is not None:
+        cmd.append(pubkey)
+    proc = subprocess.run(cmd, check=False, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Case '{case}' failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+def summarize(raw, size) -> dict:
+    """
+    Compute latency (median and best), throughput
+    and peak RSS of a case
+    """
+    latency = statistics.median(raw["seconds"])
+    result = {
+        "latency": latency,
+        "best": min(raw["seconds"]),
+        "peak_rss": raw["peak_rss"],
+    }
+    if size is not None:
+        result["throughput"] = size / latency / 1024**2 if latency > 0 else None
+    return result
+
+
+def run(args) -> dict:
+    """
+    Run all selected cases, returning the results
+    """
+    os.makedirs(args.data_dir, exist_ok=True)
+    max_size = parse_size(args.max_size)
+    sizes = [s for s in FILE_SIZES if parse_size(s) <= max_size]
+    results = {}
+
+    key, pubkey = make_key(args.data_dir)
+    for size_name in sizes:
+        path = make_file(args.data_dir, size_name)
+        sign_file(key, path)
+        repeat = args.repeat if parse_size(size_name) < 1024**3 else 1
+
+        for case in FILE_CASES:
+            if args.case and case not in args.case:
+                continue
+            name = f"{case}[{size_name}]"
+            raw = spawn_case(case, path, repeat, pubkey)
+            results[name] = summarize(raw, parse_size(size_name))
+            print_result(name, results[name])
+
+    for case in QR_CASES:
+        if args.case and case not in args.case:
+            continue
+        for payload in QR_PAYLOADS:
+            name = f"{case}[{payload}]"
+            raw = spawn_case(case, payload, args.repeat, None)
+            results[name] = summarize(raw, None)
+            print_result(name, results[name])
+
+    return results
+
+
+def print_result(name, result):
+    """
+    Print a single result line
+    """
+    rss = result["peak_rss"]
+    rss = f"{rss / 1024**2:8.1f} MiB" if rss else "     n/a"
+    throughput = result.get("throughput")
+    throughput = f"{throughput:10.1f} MB/s" if throughput else " " * 15
+    print(f"{name:28} {result['latency'] * 1000:12.3f} ms {throughput} {rss}")
+
+
+def compare(results, baseline, threshold) -> list:
+    """
+    Compare results with a baseline, printing ratios
+    and returning the names of regressed cases
+    """
+    regressions = []
+    print(f"\nComparing with baseline ({threshold:.0%} threshold):")
+
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            continue
+        old = baseline["results"][name]
+        # best run is less noisy than median to spot regressions
+        ratios = {"latency": result["best"] / old["best"]}
+        if result["peak_rss"] and old["peak_rss"]:
+            ratios["peak_rss"] = result["peak_rss"] / old["peak_rss"]
+
+        worse = [k for k, ratio in ratios.items() if ratio > 1 + threshold]
+        status = "REGRESSION" if worse else "ok"
+        if worse:
+            regressions.append(name)
+        detail = ", ".join(f"{k} x{ratio:.2f}" for k, ratio in ratios.items())
+        print(f"{name:28} {status:10} {detail}")
+
+    return regressions
+
+
+def main():
+    """
+    Parse arguments and run benchmarks
+    """
+    parser = argparse.ArgumentParser(
+        prog="bench", description="Headless benchmarks of ksigner hot paths"
+    )
+    parser.add_argument(
+        "--max-size",
+        default="64M",
+        help=f"biggest synthetic file, from {FILE_SIZES} (default: 64M)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs per case (default: 5)"
+    )
+    parser.add_argument(
+        "--case",
+        action="append",
+        choices=FILE_CASES + QR_CASES,
+        help="run only the given case (can be repeated)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "ksigner-bench"),
+        help="where synthetic files are kept between runs",
+    )
+    parser.add_argument("--save", help="save results as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative slowdown flagged as regression (default: 0.10)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'case':28} {'latency':>15} {'throughput':>15} {'peak rss':>12}")
+    results = run(args)
+
+    if args.save:
+        data = {
+            "meta": {
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+            },
+            "results": results,
+        }
+        with open(args.save, mode="w", encoding="utf-8") as f_json:
+            json.dump(data, f_json, indent=2)
+        print(f"\nBaseline saved on {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f_json:
+            baseline = json.load(f_json)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _case, _target, _repeat = sys.argv[2:5]
+        _pubkey = sys.argv[5] if len(sys.argv) > 5 else None
+        print(json.dumps(run_case(_case, _target, int(_repeat), _pubkey)))
+    else:
+        main()
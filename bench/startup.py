@@ -0,0 +1,281 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+startup.py
+
+Cold start benchmarks of ksigner: the time, from process spawn, to draw
+the first frame of `ksigner-gui` or to finish a `ksigner-cli` command,
+and which heavy modules (camera stack, OpenCV, OpenSSL, qrcode)
+were imported on the way.
+
+Every case runs in a fresh python process, so nothing is warm. Each
+case has a time budget and a list of modules that must not be loaded;
+a case over budget, or loading a forbidden module, fails the run.
+
+When a PyInstaller build of `ksigner-cli` (see `inst/kbuilder.py`) is
+found in `dist`, its `verify` cold start is checked too.
+
+Usage:
+------
+
+    python bench/startup.py
+    python bench/startup.py --repeat 5 --cli-budget 0.5
+"""
+####################
+# Standard libraries
+####################
+import os
+import sys
+import json
+import time
+import runpy
+import argparse
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+from importlib.util import spec_from_file_location, module_from_spec
+
+#################
+# Local libraries
+#################
+from run import make_key, make_file, sign_file
+
+# Get root path of ksigner to import its modules
+ROOT_PATH = Path(__file__).parent.parent.absolute()
+SRC_PATH = ROOT_PATH / "src"
+
+# Heavy modules watched on every case
+WATCHED_MODULES = ("kivy_garden.zbarcam", "cv2", "OpenSSL", "qrcode")
+CAMERA_MODULES = ("kivy_garden.zbarcam", "cv2")
+
+# The main menu needs none of the heavy modules; verifying never needs
+# the camera stack, and the cli needs none of them to verify
+CASES = {
+    "gui": {"kind": "gui", "navigate": None, "forbidden": WATCHED_MODULES},
+    "gui-verify": {"kind": "gui", "navigate": "verify", "forbidden": CAMERA_MODULES},
+    "cli-version": {"kind": "cli", "command": "version", "forbidden": WATCHED_MODULES},
+    "cli-verify": {"kind": "cli", "command": "verify", "forbidden": WATCHED_MODULES},
+    "binary-verify": {"kind": "binary", "command": "verify", "forbidden": ()},
+}
+
+
+def binary_path() -> Path:
+    """
+    Path of `ksigner-cli` executable built by `inst/kbuilder.py`
+    """
+    suffix = {"Linux": "linux", "Windows": "win.exe", "Darwin": "mac"}
+    return ROOT_PATH / "dist" / f"ksigner-cli-{suffix.get(platform.system())}"
+
+
+def cli_args(command, data_dir) -> list:
+    """
+    Arguments of `ksigner-cli` for a command
+    """
+    if command == "version":
+        return ["--version"]
+
+    target = os.path.join(data_dir, "bench-1M.bin")
+    return [
+        "verify",
+        "--file",
+        target,
+        "--sig-file",
+        f"{target}.sig",
+        "--pub-file",
+        os.path.join(data_dir, "bench.pem"),
+        "--no-cache",
+    ]
+
+
+# ksigner modules are found at runtime through sys.path
+# pylint: disable=import-outside-toplevel,import-error
+def run_gui(navigate, spawned_at) -> dict:
+    """
+    Start `ksigner-gui` in this process (the worker), optionally
+    navigate to a screen, and stop once it is drawn
+    """
+    sys.path.insert(0, str(SRC_PATH))
+    os.environ["KIVY_NO_ARGS"] = "1"
+
+    spec = spec_from_file_location("ksigner_gui", SRC_PATH / "ksigner-gui.py")
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    from kivy.clock import Clock
+
+    app = module.KSignerApp()
+    result = {}
+
+    def _stop(*_args):
+        result["modules"] = [m for m in WATCHED_MODULES if m in sys.modules]
+        app.stop()
+
+    def _navigate(*_args):
+        result["seconds"] = time.time() - spawned_at
+        if navigate is not None:
+            app.root.current = navigate
+        Clock.schedule_once(_stop)
+
+    def _on_start(*_args):
+        Clock.schedule_once(_navigate)
+
+    app.bind(on_start=_on_start)
+    app.run()
+    return result
+
+
+def run_cli(args) -> dict:
+    """
+    Run `ksigner-cli` in this process (the worker)
+    as its main script, with the given arguments
+    """
+    sys.path.insert(0, str(SRC_PATH))
+    sys.argv = ["ksigner-cli"] + args
+    runpy.run_path(str(SRC_PATH / "ksigner-cli.py"), run_name="__main__")
+    return {"modules": [m for m in WATCHED_MODULES if m in sys.modules]}
+
+
+def spawn_case(case, data_dir) -> dict:
+    """
+    Run a case in a fresh process, returning its cold start
+    seconds and the watched modules it loaded
+    """
+    spec = CASES[case]
+    if spec["kind"] == "binary":
+        cmd = [str(binary_path())] + cli_args(spec["command"], data_dir)
+    else:
+        cmd = [sys.executable, __file__, "--worker", case, data_dir, repr(time.time())]
+
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, check=False, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Case '{case}' failed:\n{proc.stderr}")
+
+    if spec["kind"] == "binary":
+        return {"seconds": seconds, "modules": []}
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result.setdefault("seconds", seconds)
+    return result
+
+
+def check(case, runs, budget) -> list:
+    """
+    Print the best cold start of a case,
+    returning the reasons it failed, if any
+    """
+    best = min(run["seconds"] for run in runs)
+    loaded = sorted({m for run in runs for m in run["modules"]})
+    forbidden = [m for m in loaded if m in CASES[case]["forbidden"]]
+
+    failures = []
+    if best > budget:
+        failures.append(f"{best:.3f}s over budget of {budget:.3f}s")
+    if forbidden:
+        failures.append(f"loaded {', '.join(forbidden)}")
+
+    status = "FAILED" if failures else "ok"
+    modules = ", ".join(loaded) or "-"
+    print(
+        f"{case:16} {best * 1000:10.1f} ms {budget * 1000:10.1f} ms {status:8} {modules}"
+    )
+    return failures
+
+
+def main():
+    """
+    Parse arguments and run startup benchmarks
+    """
+    parser = argparse.ArgumentParser(
+        prog="startup", description="Cold start benchmarks of ksigner"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per case (default: 3)"
+    )
+    parser.add_argument(
+        "--case",
+        action="append",
+        choices=tuple(CASES),
+        help="run only the given case (can be repeated)",
+    )
+    parser.add_argument(
+        "--gui-budget",
+        type=float,
+        default=3.0,
+        help="seconds allowed to draw the first frame (default: 3.0)",
+    )
+    parser.add_argument(
+        "--cli-budget",
+        type=float,
+        default=1.0,
+        help="seconds allowed to a cli command, from source (default: 1.0)",
+    )
+    parser.add_argument(
+        "--binary-budget",
+        type=float,
+        default=3.0,
+        help="seconds allowed to a cli command, from PyInstaller build (default: 3.0)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "ksigner-bench"),
+        help="where synthetic files are kept between runs",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    key, _pubkey = make_key(args.data_dir)
+    sign_file(key, make_file(args.data_dir, "1M"))
+    budgets = {
+        "gui": args.gui_budget,
+        "cli": args.cli_budget,
+        "binary": args.binary_budget,
+    }
+
+    print(f"{'case':16} {'cold start':>13} {'budget':>13} {'status':8} loaded modules")
+    failed = False
+    for case, spec in CASES.items():
+        if args.case and case not in args.case:
+            continue
+        if spec["kind"] == "binary" and not binary_path().is_file():
+            print(f"{case:16} {'skipped, no ' + binary_path().name}")
+            continue
+        runs = [spawn_case(case, args.data_dir) for _ in range(args.repeat)]
+        failed = bool(check(case, runs, budgets[spec["kind"]])) or failed
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _case, _data_dir, _spawned_at = sys.argv[2], sys.argv[3], float(sys.argv[4])
+        _spec = CASES[_case]
+        if _spec["kind"] == "gui":
+            _result = run_gui(_spec["navigate"], _spawned_at)
+        else:
+            _result = run_cli(cli_args(_spec["command"], _data_dir))
+        print(json.dumps(_result))
+    else:
+        main()
@@ -79,6 +79,14 @@ elif sys.argv[1] == "gui":
         f"--add-data={ZBARCAM_PATH}/*:kivy_garden/zbarcam",
         f"--add-data={XCAMERA_PATH}/*:kivy_garden/xcamera",
         f"--add-data={XCAMERA_PATH}/data/*.ttf:kivy_garden/xcamera/data",
+        # screens are imported by name, on first navigation,
+        # so PyInstaller can't find them by itself
+        "--hidden-import=screens.main",
+        "--hidden-import=screens.sign",
+        "--hidden-import=screens.verify",
+        "--hidden-import=screens.qrcode",
+        "--hidden-import=screens.scan",
+        "--hidden-import=kivy_garden.zbarcam",
         "--windowed",
         "--onefile",
         f"-n={KNAME}",
@@ -0,0 +1,149 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+batch.py
+
+Export a :class:`BatchVerifyer` class to be used in `ksigner-cli`
+to verify all signed files of a directory at once.
+"""
+####################
+# Standard libraries
+####################
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+#################
+# Local libraries
+#################
+from cli.verifyer import Verifyer
+
+
+class BatchVerifyer:
+    """
+    BatchVerifyer pairs each file `X` with its `X.sig` signature found
+    in a directory tree and verifies all pairs on a thread pool, with
+    the same public key. Both :module:`hashlib` and OpenSSL release the
+    GIL, so verifications scale with the number of cores.
+
+    The public key is parsed once, in a single :class:`Verifyer`
+    context shared by all threads.
+
+    Kwargs:
+    -------
+        :param:`path` the directory with files and their `.sig` files
+        :param:`pubkey` the path of public key file
+        :param:`buffer_size` size, in bytes, of the buffer used to hash each file
+        :param:`cache` an optional :class:`DigestCache` shared by all threads
+        :param:`workers` number of verification threads (default: number of cpus)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.path = os.path.abspath(kwargs.get("path"))
+        self.pubkey = kwargs.get("pubkey")
+        self.buffer_size = kwargs.get("buffer_size")
+        self.cache = kwargs.get("cache")
+        self.workers = kwargs.get("workers") or os.cpu_count() or 1
+        self._verifyer = None
+
+    def collect(self) -> list:
+        """
+        List, sorted, all `(file, signature)` pairs
+        found under :data:`path`
+        """
+        pairs = []
+        for root, _dirs, names in os.walk(self.path):
+            for name in names:
+                if name.endswith(".sig"):
+                    signature = os.path.join(root, name)
+                    pairs.append((signature[: -len(".sig")], signature))
+        return sorted(pairs)
+
+    def _verify_pair(self, file, signature) -> tuple:
+        """
+        Verify a single pair, returning a tuple
+        `(file, verified, message, elapsed, size)`
+        """
+        start = time.perf_counter()
+        verified, msg = self._verifyer.check(file, signature)
+        size = os.path.getsize(file) if os.path.isfile(file) else 0
+        return (file, verified, msg, time.perf_counter() - start, size)
+
+    def _print_result(self, result):
+        """
+        Print the status and timing of a single verified file
+        """
+        file, verified, msg, elapsed, _size = result
+        name = os.path.relpath(file, self.path)
+        if verified:
+            print(f"[OK]     {name} ({elapsed:.3f}s)")
+        else:
+            reason = msg.splitlines()[-1].strip()
+            print(f"[FAILED] {name} ({elapsed:.3f}s): {reason}")
+
+    def verify(self) -> bool:
+        """
+        Verify all pairs, printing the status and timing of
+        each file as soon as it is done, and a summary at end.
+        Return :data:`True` only if all signatures are valid
+        """
+        pairs = self.collect()
+        if len(pairs) == 0:
+            print(f"No '.sig' files found at '{self.path}'")
+            return False
+
+        self._verifyer = Verifyer(
+            pubkey=self.pubkey,
+            buffer_size=self.buffer_size,
+            cache=self.cache,
+            verbose=False,
+        )
+        self._verifyer.build()
+
+        print(f"Verifying {len(pairs)} files with {self.workers} workers...")
+        start = time.perf_counter()
+        results = []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self._verify_pair, file, signature)
+                for file, signature in pairs
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                self._print_result(result)
+                results.append(result)
+
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for result in results if not result[1])
+        size = sum(result[4] for result in results)
+        rate = size / elapsed / 1024 / 1024 if elapsed > 0 else 0
+        print(
+            " ".join(
+                [
+                    f"\n{len(pairs) - failed} verified, {failed} failed",
+                    f"in {elapsed:.3f}s ({rate:.1f} MB/s)",
+                ]
+            )
+        )
+        return failed == 0
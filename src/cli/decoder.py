@@ -0,0 +1,185 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+decoder.py
+
+Export a :class:`QRDecoder` class to be used by :class:`Scanner`.
+To be used only with `ksigner-cli`.
+"""
+####################
+# Standard libraries
+####################
+import time
+
+#######################
+# Thrid party libraries
+#######################
+import cv2
+
+
+class QRDecoder:
+    """
+    QRDecoder detects and decodes QR codes on a sequence of frames,
+    doing as little work as possible per frame:
+
+    - frames are converted to gray scale and downscaled before detection;
+    - once a QR code is located, next frames are decoded only inside
+      a padded region of interest (ROI) around its last bounding box;
+    - when detection fails, an adaptive threshold (for poor lighting)
+      and a small image pyramid are tried before giving up.
+
+    Kwargs:
+    -------
+        :param:`max_width` frames wider than this are downscaled (default: 640)
+        :param:`padding` ROI padding, relative to the QR code size (default: 0.5)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.max_width = kwargs.get("max_width") or 640
+        self.padding = kwargs.get("padding") or 0.5
+        self.stats = {"frames": 0, "roi": 0, "fallback": 0, "seconds": 0.0}
+        self._detector = cv2.QRCodeDetector()
+        self._roi = None
+
+    @staticmethod
+    def _gray(frame):
+        """
+        Single channel version of frame
+        """
+        if frame.ndim == 3:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    @staticmethod
+    def _threshold(image):
+        """
+        Binarize with a local threshold, recovering
+        QR codes on shadowed or glaring screens
+        """
+        return cv2.adaptiveThreshold(
+            image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5
+        )
+
+    @staticmethod
+    def _resize(image, scale):
+        """
+        Resize image by scale, if needed
+        """
+        if scale == 1:
+            return image
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    def _detect(self, image, scale, offset) -> str:
+        """
+        Detect and decode a QR code on image, keeping its bounding box
+        (mapped back to full frame coordinates) as the next ROI
+        """
+        qr_data, bbox, _straight_qrcode = self._detector.detectAndDecode(image)
+
+        if bbox is not None:
+            points = bbox.reshape(-1, 2) / scale
+            (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+            pad = max(x_max - x_min, y_max - y_min) * self.padding
+            self._roi = (
+                int(x_min - pad + offset[0]),
+                int(y_min - pad + offset[1]),
+                int(x_max + pad + offset[0]),
+                int(y_max + pad + offset[1]),
+            )
+
+        return qr_data
+
+    def _decode_roi(self, gray) -> str:
+        """
+        Decode only inside the ROI found on previous frames
+        """
+        height, width = gray.shape[:2]
+        x_0, y_0, x_1, y_1 = self._roi
+        x_0, y_0 = max(x_0, 0), max(y_0, 0)
+        x_1, y_1 = min(x_1, width), min(y_1, height)
+
+        if x_1 - x_0 < 21 or y_1 - y_0 < 21:
+            self._roi = None
+            return ""
+
+        scale = min(1.0, self.max_width / (x_1 - x_0))
+        roi = self._resize(gray[y_0:y_1, x_0:x_1], scale)
+        return self._detect(roi, scale, (x_0, y_0))
+
+    def _decode_pyramid(self, gray) -> str:
+        """
+        Decode on a downscaled frame, then its thresholded
+        version, then on a small pyramid of other scales
+        """
+        width = gray.shape[1]
+        base = min(1.0, self.max_width / width)
+        image = self._resize(gray, base)
+
+        qr_data = self._detect(image, base, (0, 0))
+        if qr_data:
+            return qr_data
+
+        self.stats["fallback"] += 1
+        qr_data = self._detect(self._threshold(image), base, (0, 0))
+        if qr_data:
+            return qr_data
+
+        for scale in (min(1.0, base * 2), base / 2):
+            if scale == base or width * scale < 21:
+                continue
+            qr_data = self._detect(self._resize(gray, scale), scale, (0, 0))
+            if qr_data:
+                return qr_data
+
+        return ""
+
+    def decode(self, frame) -> str:
+        """
+        Decode a QR code on frame, returning
+        its data or an empty string
+        """
+        start = time.perf_counter()
+        self.stats["frames"] += 1
+        gray = self._gray(frame)
+        qr_data = ""
+
+        if self._roi is not None:
+            qr_data = self._decode_roi(gray)
+            if qr_data:
+                self.stats["roi"] += 1
+
+        if not qr_data:
+            self._roi = None
+            qr_data = self._decode_pyramid(gray)
+
+        self.stats["seconds"] += time.perf_counter() - start
+        return qr_data
+
+    def mean_ms(self) -> float:
+        """
+        Mean time, in milliseconds, spent per decoded frame
+        """
+        if self.stats["frames"] == 0:
+            return 0.0
+        return 1000 * self.stats["seconds"] / self.stats["frames"]
@@ -0,0 +1,148 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+manifest.py
+
+Export a :class:`Manifest` class to be used in `ksigner-cli`
+to sign many files at once through a single SHA256SUMS file.
+"""
+####################
+# Standard libraries
+####################
+import os
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
+#################
+# Local libraries
+#################
+from cli.signer import Signer
+
+
+class Manifest:
+    """
+    Manifest hashes a set of files, in parallel, into a GNU compatible
+    `SHA256SUMS` file. Signing that manifest with :class:`Signer` gives a
+    signature for all listed files with only one round trip to the device,
+    while `sha256sum -c SHA256SUMS` keeps checking each file.
+
+    Kwargs:
+    -------
+        :param:`path` a directory or a glob pattern of files to be listed
+        :param:`output` the manifest path (default: `SHA256SUMS` in base directory)
+        :param:`buffer_size` size, in bytes, of the buffer used to hash each file
+        :param:`cache` an optional :class:`DigestCache` shared by all threads
+        :param:`workers` number of hashing threads (default: number of cpus)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.path = kwargs.get("path")
+        self.buffer_size = kwargs.get("buffer_size")
+        self.cache = kwargs.get("cache")
+        self.workers = kwargs.get("workers") or os.cpu_count() or 1
+
+        if os.path.isdir(self.path):
+            self.base = os.path.abspath(self.path)
+        else:
+            # the deepest directory of pattern without any wildcard
+            base = os.path.dirname(self.path)
+            while any(char in base for char in "*?["):
+                base = os.path.dirname(base)
+            self.base = os.path.abspath(base or ".")
+
+        self.output = os.path.abspath(
+            kwargs.get("output") or os.path.join(self.base, "SHA256SUMS")
+        )
+
+    def _is_output(self, file, skip) -> bool:
+        """
+        True for the manifest itself, any of its sidecar files
+        (`.sig`, `.merkle`, `.<digest>sum.txt`, even from a previous
+        run with other options) and any path in :data:`skip`
+        """
+        if file == self.output or file in skip:
+            return True
+        return file.startswith(f"{self.output}.") and file.endswith(
+            ("sum.txt", ".sig", ".merkle")
+        )
+
+    def collect(self, skip=()) -> list:
+        """
+        List, sorted, all regular files to be hashed. The manifest,
+        its sidecar files and the paths in :data:`skip` (e.g., all
+        outputs of :class:`Signer`) are never listed
+        """
+        if os.path.isdir(self.path):
+            files = []
+            for root, _dirs, names in os.walk(self.base):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files = glob.glob(self.path, recursive=True)
+
+        skip = {os.path.abspath(f) for f in skip}
+        return sorted(
+            os.path.abspath(f)
+            for f in files
+            if os.path.isfile(f) and not self._is_output(os.path.abspath(f), skip)
+        )
+
+    def _hash_file(self, file) -> str:
+        """
+        Reuse :class:`Signer` to hash a single file. The
+        :module:`hashlib` releases the GIL while digesting,
+        so many of these calls run in parallel on threads
+        """
+        signer = Signer(file=file, buffer_size=self.buffer_size, cache=self.cache)
+        return signer.hash_file()
+
+    def _format_line(self, data, file) -> str:
+        """
+        Format one line like GNU `sha256sum` does, with the
+        path relative to base directory and, when needed,
+        escaping backslashes and newlines
+        """
+        name = os.path.relpath(file, self.base).replace(os.sep, "/")
+        if "\\" in name or "\n" in name:
+            name = name.replace("\\", "\\\\").replace("\n", "\\n")
+            return f"\\{data}  {name}\n"
+        return f"{data}  {name}\n"
+
+    def save(self, skip=()) -> str:
+        """
+        Hash all collected files, except the ones in :data:`skip`,
+        and write the manifest, returning its path
+        """
+        files = self.collect(skip)
+        if len(files) == 0:
+            raise FileNotFoundError(f"No files found at '{self.path}'")
+
+        print(f"Hashing {len(files)} files with {self.workers} workers...")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            digests = list(executor.map(self._hash_file, files))
+
+        with open(self.output, mode="w", encoding="utf-8", newline="\n") as manifest:
+            for data, file in zip(digests, files):
+                manifest.write(self._format_line(data, file))
+
+        print(f"Manifest saved on {self.output}")
+        return self.output
@@ -25,68 +25,351 @@ scanner.py
 Export a :class:`Scanner` class to be used :class:`Signer` and :class:`Verifyer`.
 To be used only with `ksigner-cli`.
 """
+####################
+# Standard libraries
+####################
+import os
+import sys
+import time
+from threading import Thread, Condition, Event, local
+from concurrent.futures import ThreadPoolExecutor
+
 #######################
 # Thrid party libraries
 #######################
 import cv2
 
+#################
+# Local libraries
+#################
+from cli.decoder import QRDecoder
+from utils.multipart import PartTracker, is_part
+
+# Files decoded as single images; other
+# files are opened as videos
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
 
+def wait_enter(message):
+    """
+    Wait the user to press enter. When stdin is not a terminal
+    (e.g., it carries the file being signed), the answer is read
+    from the controlling terminal, or not waited at all if none
+    """
+    if sys.stdin is not None and sys.stdin.isatty():
+        input(message)
+        return
+
+    tty = "CON" if sys.platform.startswith("win") else "/dev/tty"
+    try:
+        with open(tty, "r+", encoding="utf-8") as terminal:
+            terminal.write(message)
+            terminal.flush()
+            terminal.readline()
+    except OSError:
+        print(message)
+
+
+# pylint: disable=too-many-instance-attributes
 class Scanner:
     """
     Scanner is the cli utility to scan signatures and public keys
     when user uses `ksigner-cli` utility.
+
+    Scanning is a pipeline of three independent loops, so a slow
+    decode never stalls the preview nor makes the camera queue
+    stale frames:
+
+    - a capture thread always keeps only the newest frame;
+    - a decode thread decodes, with :class:`QRDecoder`, the newest
+      frame not yet decoded;
+    - the main thread shows the preview (cv2 windows must live there).
+
+    Animated QR codes (BBQr), with payloads split in many parts, are
+    collected by a :class:`PartTracker`, in any order, until each part
+    was scanned once.
+
+    QR codes can also be decoded offline, without camera, from an image,
+    a video file or a directory of frames (see :meth:`scan_source`).
+
+    Kwargs:
+    -------
+        :param:`device` the camera index to be opened (default: 0)
     """
 
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.device = kwargs.get("device") or 0
+        self.stats = {}
+        self._frame = None
+        self._frame_id = 0
+        self._frame_ready = Condition()
+        self._stop = Event()
+        self._qr_data = ""
+        self._camera_lost = False
+        self._decoder = None
+        self._local = local()
+        self._tracker = PartTracker()
+
+    def _capture(self, vid):
+        """
+        Capture loop: read frames as fast as the camera gives
+        them, replacing (dropping) any frame not yet decoded
+        """
+        failures = 0
+        while not self._stop.is_set():
+            ret, frame = vid.read()
+
+            # some cameras fail to give their first frames;
+            # stop only when no more frames will come
+            if not ret:
+                failures += 1
+                if failures > 30:
+                    self._camera_lost = True
+                    self._stop.set()
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+
+            with self._frame_ready:
+                self._frame = frame
+                self._frame_id += 1
+                self._frame_ready.notify_all()
+
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+
+    def _consume(self, qr_data) -> str:
+        """
+        Give back the scanned data, or, for a part of an animated
+        QR code, the whole payload once all parts were scanned. An
+        invalid part resets the scanned ones
+        """
+        if not is_part(qr_data):
+            return qr_data
+
+        # a malformed part, or one mixed from another animation,
+        # must not kill the decode loop: start the scan again
+        try:
+            if self._tracker.add(qr_data):
+                scanned, total = self._tracker.progress
+                print(f"\rScanned {scanned} of {total} parts", end="", flush=True)
+                if self._tracker.complete:
+                    print("")
+                    return self._tracker.text()
+        except ValueError as exc:
+            print(f"\nIgnoring scanned parts: {exc}")
+            self._tracker.reset()
+        return ""
+
+    def _decode(self):
+        """
+        Decode loop: detect and decode a QR code on the newest
+        frame, until some data is found or scan is stopped
+        """
+        last_id = 0
+
+        while not self._stop.is_set():
+            with self._frame_ready:
+                self._frame_ready.wait_for(
+                    lambda: self._frame_id != last_id or self._stop.is_set()
+                )
+                if self._stop.is_set():
+                    break
+                frame, last_id = self._frame, self._frame_id
+
+            qr_data = self._decoder.decode(frame)
+            self.stats["decodes"] += 1
+            if qr_data:
+                qr_data = self._consume(qr_data)
+
+            # Verify null data
+            if len(qr_data) > 0:
+                self._qr_data = qr_data
+                self.stats["time_to_lock"] = time.perf_counter() - self.stats["start"]
+                self._stop.set()
+
+    def _print_stats(self):
+        """
+        Show how fast frames were captured and decoded
+        """
+        elapsed = time.perf_counter() - self.stats["start"]
+        capture_fps = self._frame_id / elapsed if elapsed > 0 else 0
+        decode_fps = self.stats["decodes"] / elapsed if elapsed > 0 else 0
+        lock = self.stats.get("time_to_lock")
+        lock = f"first decode in {lock:.2f}s" if lock is not None else "no decode"
+        print(
+            " ".join(
+                [
+                    f"Scan: {lock} ({capture_fps:.1f} capture fps,",
+                    f"{decode_fps:.1f} decode fps,",
+                    f"{self._decoder.mean_ms():.1f} ms per decode,",
+                    f"{self._decoder.stats['roi']} ROI hits)",
+                ]
+            )
+        )
+
     def _scan(self) -> str:
         """
         Opens a scan window and uses cv2 to detect
         and decode a QR code, returning its data.
         Can be applyed some normalization
-        or gray scale
-        """
-        vid = cv2.VideoCapture(0)
-        detector = cv2.QRCodeDetector()
-        qr_data = None
+        or gray scale.
 
-        while True:
-            # Capture the video frame by frame
-            # use some dummy vars (__+[a-zA-Z0-9]*?$)
-            # to avoid the W0612 'Unused variable' pylint message
-            _ret, frame = vid.read()
+        Raises :class:`OSError` if the camera can't be
+        opened or stops giving frames
+        """
+        vid = cv2.VideoCapture(self.device)
+        self._stop.clear()
+        self._frame, self._frame_id, self._qr_data = None, 0, ""
+        self._camera_lost = False
+        self._tracker.reset()
+        self.stats = {"start": time.perf_counter(), "decodes": 0}
+        self._decoder = QRDecoder()
 
-            # delattrtect qrcode
-            qr_data, _bbox, _straight_qrcode = detector.detectAndDecode(frame)
+        if not vid.isOpened():
+            raise OSError(f"Unable to open camera {self.device}")
 
-            # Verify null data
-            if len(qr_data) > 0:
-                break
+        threads = (
+            Thread(target=self._capture, args=(vid,), daemon=True),
+            Thread(target=self._decode, daemon=True),
+        )
+        for thread in threads:
+            thread.start()
 
-            # Display the resulting frame
-            cv2.imshow("frame", frame)
+        shown_id = 0
+        while not self._stop.is_set():
+            # Display the newest frame, if not shown yet
+            with self._frame_ready:
+                frame, frame_id = self._frame, self._frame_id
+            if frame is not None and frame_id != shown_id:
+                cv2.imshow("frame", frame)
+                shown_id = frame_id
 
             # the 'q' button is set as the
             # quitting button you may use any
             # desired button of your choice
             if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
+                self._stop.set()
+
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        for thread in threads:
+            thread.join()
 
         vid.release()
         cv2.destroyAllWindows()
+        self._print_stats()
+
+        if self._camera_lost and not self._qr_data:
+            raise OSError(f"Camera {self.device} stopped giving frames")
+        return self._qr_data
+
+    def _decode_image(self, path) -> str:
+        """
+        Decode a single image file, with one
+        :class:`QRDecoder` per worker thread
+        """
+        if not hasattr(self._local, "decoder"):
+            self._local.decoder = QRDecoder()
+
+        frame = cv2.imread(path)
+        if frame is None:
+            return ""
+        return self._local.decoder.decode(frame)
+
+    def _scan_images(self, paths) -> str:
+        """
+        Decode many images on a pool of threads (cv2 releases the GIL),
+        returning the data of the first one, in order, with a QR code
+        (or all parts of an animated one)
+        """
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = [executor.submit(self._decode_image, path) for path in paths]
+            for future in futures:
+                qr_data = self._consume(future.result())
+                if qr_data:
+                    for pending in futures:
+                        pending.cancel()
+                    return qr_data
+        return ""
+
+    def _scan_video(self, path) -> str:
+        """
+        Decode frames of a video file until a QR code
+        (or all parts of an animated one) is found
+        """
+        vid = cv2.VideoCapture(path)
+        decoder = QRDecoder()
+        qr_data = ""
+
+        while not qr_data:
+            ret, frame = vid.read()
+            if not ret:
+                break
+            qr_data = decoder.decode(frame)
+            if qr_data:
+                qr_data = self._consume(qr_data)
 
+        vid.release()
         return qr_data
 
-    def scan_signature(self) -> str:
+    def scan_source(self, source) -> str:
         """
-        Scan with camera the generated signatue
+        Decode a QR code without camera, from an image, a video file
+        or a directory of frames (images), through the same
+        :class:`QRDecoder` used by camera scans
         """
-        _ = input("Press enter to scan signature")
+        self._tracker.reset()
+
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"No such file or directory: '{source}'")
+
+        if os.path.isdir(source):
+            paths = sorted(
+                os.path.join(source, name)
+                for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            qr_data = self._scan_images(paths)
+
+        elif source.lower().endswith(IMAGE_EXTENSIONS):
+            qr_data = self._consume(self._decode_image(source))
+
+        else:
+            qr_data = self._scan_video(source)
+
+        if not qr_data and self._tracker.total > 0:
+            scanned, total = self._tracker.progress
+            print("")
+            raise ValueError(f"Only {scanned} of {total} parts found in '{source}'")
+
+        if not qr_data:
+            raise ValueError(f"No QR code found in '{source}'")
+
+        return qr_data
+
+    def scan_signature(self, source=None) -> str:
+        """
+        Scan with camera the generated signatue,
+        or decode it from an image, video or directory
+        """
+        if source is not None:
+            return self.scan_source(source)
+
+        wait_enter("Press enter to scan signature")
         signature = self._scan()
         return signature
 
-    def scan_public_key(self) -> str:
+    def scan_public_key(self, source=None) -> str:
         """
-        Scan with camera the generated public key
+        Scan with camera the generated public key,
+        or decode it from an image, video or directory
         """
-        _ = input("Press enter to scan public key")
+        if source is not None:
+            return self.scan_source(source)
+
+        wait_enter("Press enter to scan public key")
         public_key = self._scan()
         return public_key
@@ -28,32 +28,87 @@ Export a :class:`Signer` class to be used in `ksigner-cli` and
 ####################
 # Standard libraries
 ####################
-import hashlib
+import sys
 import base64
+from contextlib import nullcontext
 
 #################
 # Local libraries
 #################
 from utils.constants import KSIGNER_COMPRESSED_PUBKEY_PREPEND
-from utils.qr import make_qr_code
-from cli.scanner import Scanner
+from utils.hasher import Hasher
 
 
+# pylint: disable=too-many-instance-attributes
 class Signer:
     """
     Signer is the class that manages the `sign` command.
 
+    OpenCV (:class:`Scanner`) and :module:`qrcode` are only imported
+    when a QR code is printed or scanned, so hashing a file
+    (e.g., by :class:`Manifest`) never pays for them.
+
     Kwargs:
     -------
-        :param:`file` the file to be signer
+        :param:`file` the file to be signer, or `-` to read it from stdin
+        :param:`tee` an optional path where the file is copied while
+            it's hashed (e.g., to save a stream read from stdin); sidecar
+            files are then named after it
+        :param:`hash_output` path of the sha256sum file
+            (default: `<file>.sha256sum.txt`)
+        :param:`sig_output` path of the signature file (default: `<file>.sig`)
         :param:`owner` the owner of file
+        :param:`buffer_size` size, in bytes, of the buffer used to hash the file
+        :param:`extra_algorithms` other :module:`hashlib` algorithms
+            (e.g., 'sha512', 'blake2b') digested in the same read pass
+            than sha256, each one saved in its own sidecar file
+        :param:`threads` if True, each digest runs on its own worker thread
+        :param:`tree` if True, sign the commitment of a :class:`MerkleTree`
+            of file, hashed in parallel, instead of its sha256
+        :param:`leaf_size` size, in bytes, of each leaf with :data:`tree`
+        :param:`workers` number of hashing processes with :data:`tree`
+        :param:`cache` an optional :class:`DigestCache` of already hashed files
+        :param:`progress` an optional progress hook (see :module:`utils.progress`)
+        :param:`cancel` an optional :class:`threading.Event` to cancel hashing
+        :param:`sig_image` image, video or directory with the signature
+            QR code, instead of scanning it with camera
+        :param:`pubkey_image` image, video or directory with the public key
+            QR code, instead of scanning it with camera
     """
 
     def __init__(self, **kwargs):
         super().__init__()
         self.file = kwargs.get("file")
+        self.tee = kwargs.get("tee")
+        self.hash_output = kwargs.get("hash_output")
+        self.sig_output = kwargs.get("sig_output")
         self.owner = kwargs.get("owner")
-        self.scanner = Scanner()
+        self.buffer_size = kwargs.get("buffer_size")
+        self.extra_algorithms = tuple(kwargs.get("extra_algorithms") or ())
+        self.threads = kwargs.get("threads") or False
+        self.hexdigests = {}
+        self.tree = kwargs.get("tree") or False
+        self.leaf_size = kwargs.get("leaf_size")
+        self.workers = kwargs.get("workers")
+        self.merkle = None
+        self.cache = kwargs.get("cache")
+        self.progress = kwargs.get("progress")
+        self.cancel = kwargs.get("cancel")
+        self.sig_image = kwargs.get("sig_image")
+        self.pubkey_image = kwargs.get("pubkey_image")
+        self._scanner = None
+
+    @property
+    def scanner(self):
+        """
+        The :class:`Scanner`, built on first use
+        """
+        if self._scanner is None:
+            # pylint: disable=import-outside-toplevel
+            from cli.scanner import Scanner
+
+            self._scanner = Scanner()
+        return self._scanner
 
     def sign(self):
         """
@@ -80,9 +135,17 @@ class Signer:
 
         self._show_warning_messages()
         data = self.hash_file()
-        self.save_hash_file(data)
+        if self.tree:
+            self.save_tree_file()
+        else:
+            self.save_hash_file(data)
+            self.save_extra_hash_files()
         self._print_qrcode(data)
         sig = self.scan_sig()
+
+        # never overwrite a signature with nothing
+        if not sig:
+            raise ValueError("No signature scanned, nothing saved")
         self.save_signature(sig)
 
     def _show_warning_messages(self):
@@ -98,27 +161,122 @@ class Signer:
 
     def hash_file(self) -> str:
         """
-        Creates a hash file before sign
+        Creates a hash file before sign.
+
+        The file is streamed through :class:`Hasher`,
+        so memory usage do not grow with file size. The
+        :data:`extra_algorithms` are digested in the same read pass
+        and kept in :data:`hexdigests`.
+
+        With :data:`tree`, the file is hashed by :class:`MerkleHasher`
+        and its :meth:`MerkleTree.commitment` is returned, the tree
+        being kept in :data:`merkle`.
+
+        When :data:`file` is `-`, stdin is hashed as it's read,
+        and copied to :data:`tee`, if any, in the same pass
         """
-        with open(self.file, "rb") as f_sig:
-            _bytes = f_sig.read()
-            data = hashlib.sha256(_bytes).hexdigest()
-            return data
+        if self.tree:
+            # pylint: disable=import-outside-toplevel
+            from utils.merkle import MerkleHasher
 
-    def save_hash_file(self, data):
+            merkle_hasher = MerkleHasher(
+                file=self.file,
+                leaf_size=self.leaf_size,
+                workers=self.workers,
+                buffer_size=self.buffer_size,
+                cache=self.cache,
+                progress=self.progress,
+                cancel=self.cancel,
+            )
+            self.merkle = merkle_hasher.tree()
+            return self.merkle.commitment.hex()
+
+        with open(self.tee, "wb") if self.tee else nullcontext() as tee:
+            hasher = Hasher(
+                file=self.file,
+                stream=sys.stdin.buffer if self.file == "-" else None,
+                tee=tee,
+                algorithms=("sha256", *self.extra_algorithms),
+                threads=self.threads,
+                buffer_size=self.buffer_size,
+                cache=self.cache,
+                progress=self.progress,
+                cancel=self.cancel,
+            )
+            self.hexdigests = hasher.hexdigests()
+        return self.hexdigests["sha256"]
+
+    @property
+    def name(self) -> str:
         """
-        Save the hash file in sha256sum format
+        The name of signed file in sidecar files: the
+        :data:`tee` copy, if any, or :data:`file` itself
+        """
+        return self.tee or self.file
+
+    def _hash_file_path(self, algorithm="sha256") -> str:
+        """
+        Path of the hash file of an algorithm
         """
-        name = f"{self.file}.sha256sum.txt"
+        if algorithm == "sha256" and self.hash_output:
+            return self.hash_output
+        return f"{self.name}.{algorithm}sum.txt"
 
-        with open(name, mode="w", encoding="utf-8") as hashfile:
-            content = f"{data} {self.file}"
+    def _sig_file_path(self) -> str:
+        """
+        Path of the signature file
+        """
+        return self.sig_output or f"{self.name}.sig"
+
+    def outputs(self) -> list:
+        """
+        Paths of all files written by :meth:`sign`
+        and :meth:`make_pubkey_certificate`
+        """
+        if self.tree:
+            files = [f"{self.name}.merkle"]
+        else:
+            files = [self._hash_file_path()]
+            files.extend(self._hash_file_path(a) for a in self.extra_algorithms)
+
+        files.extend([self._sig_file_path(), f"{self.owner}.pem"])
+        if self.tee:
+            files.append(self.tee)
+        return files
+
+    def save_hash_file(self, data, algorithm="sha256"):
+        """
+        Save the hash file in sha256sum format
+        (or in `<algorithm>sum` format for other algorithms)
+        """
+        with open(
+            self._hash_file_path(algorithm), mode="w", encoding="utf-8"
+        ) as hashfile:
+            content = f"{data} {self.name}"
             hashfile.write(content)
 
+    def save_tree_file(self):
+        """
+        Save the leaf hashes of last :meth:`hash_file`, with
+        :data:`tree`, in a compact `.merkle` sidecar file
+        """
+        self.merkle.save(f"{self.name}.merkle")
+
+    def save_extra_hash_files(self):
+        """
+        Save one hash file for each one of :data:`extra_algorithms`,
+        all of them digested by the last :meth:`hash_file`
+        """
+        for algorithm in self.extra_algorithms:
+            self.save_hash_file(self.hexdigests[algorithm], algorithm=algorithm)
+
     def _print_qrcode(self, data):
         """
         Print QRCode to console
         """
+        # pylint: disable=import-outside-toplevel
+        from utils.qr import make_qr_code
+
         # Prints the QR code
         __qrcode__ = make_qr_code(data=data)
         print(f"{__qrcode__}\n{data}\n")
@@ -127,14 +285,14 @@ class Signer:
         """
         Make signature file from scanning qrcode
         """
-        return self.scanner.scan_signature()
+        return self.scanner.scan_signature(source=self.sig_image)
 
     def save_signature(self, signature):
         """
         Save the signature data into file
         """
         # Saves a signature
-        signature_file = f"{self.file}.sig"
+        signature_file = self._sig_file_path()
 
         # encode signature to binary format
         binary_signature = base64.b64decode(signature.encode())
@@ -150,7 +308,11 @@ class Signer:
         Make public key file from scanning qrcode
         """
         # Scans the public KeyboardInterruptardInterrupt
-        pubkey = self.scanner.scan_public_key()
+        pubkey = self.scanner.scan_public_key(source=self.pubkey_image)
+
+        # never overwrite a certificate with nothing
+        if not pubkey:
+            raise ValueError("No public key scanned, nothing saved")
         self.save_pubkey_certificate(pubkey)
 
     def save_pubkey_certificate(self, pubkey):
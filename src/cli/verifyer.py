@@ -31,42 +31,131 @@ Export a :class:`Verifyer` class to be used in `ksigner-cli` and
 # Standart libraries
 ####################
 import os
+import sys
+import hashlib
+from contextlib import nullcontext
+from collections import OrderedDict
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
 
 #######################
 # Third party libraries
 #######################
-from OpenSSL import crypto
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
 
+#################
+# Local libraries
+#################
+from utils.constants import KSIGNER_PUBKEY_CACHE_SIZE
+from utils.hasher import Hasher, HashCancelled
 
+# Parsed public keys, keyed by the sha256 fingerprint
+# of their PEM data, shared by all :class:`Verifyer`
+_PUBKEYS = OrderedDict()
+_PUBKEYS_LOCK = Lock()
+
+
+def load_public_key(pem_data: bytes):
+    """
+    Parse a PEM public key with :module:`cryptography`
+    (without importing OpenSSL bindings). The most recently
+    used keys are kept parsed, so the same owner key is loaded once
+    """
+    fingerprint = hashlib.sha256(pem_data).digest()
+
+    with _PUBKEYS_LOCK:
+        if fingerprint in _PUBKEYS:
+            _PUBKEYS.move_to_end(fingerprint)
+            return _PUBKEYS[fingerprint]
+
+    key = serialization.load_pem_public_key(pem_data)
+
+    with _PUBKEYS_LOCK:
+        _PUBKEYS[fingerprint] = key
+        while len(_PUBKEYS) > KSIGNER_PUBKEY_CACHE_SIZE:
+            _PUBKEYS.popitem(last=False)
+
+    return key
+
+
+# pylint: disable=too-many-instance-attributes
 class Verifyer:
     """
     Verifyer is the class
     that manages the `verify`
 
+    Once built, a Verifyer is a reusable context for its public key:
+    :meth:`verify_many` checks any number of files against it, paying
+    per file only for hashing and one ECDSA verification.
+
     Kwargs:
     -------
 
-        :param:`file` the path of file to be verified
+        :param:`file` the path of file to be verified, or `-` for stdin
+        :param:`tee` an optional path where the file is copied while
+            it's hashed (e.g., to save a stream read from stdin)
         :param:`pubkey` the path of public key file
         :param:`signature` the path of signature file
+        :param:`buffer_size` size, in bytes, of the buffer used to hash the file
+        :param:`cache` an optional :class:`DigestCache` of already hashed files
+        :param:`tree` if True, the signature is of the commitment of a
+            :class:`MerkleTree` of file (see :class:`Signer`)
+        :param:`leaf_size` size, in bytes, of each leaf with :data:`tree`
+            (default: the one of `.merkle` sidecar, if any)
+        :param:`workers` number of hashing processes with :data:`tree`
+        :param:`verbose` print the verification steps (default: True)
+        :param:`progress` an optional progress hook (see :module:`utils.progress`)
+        :param:`cancel` an optional :class:`threading.Event` to cancel
+            :meth:`verify`, raising :class:`HashCancelled`
     """
 
     def __init__(self, **kwargs):
         super().__init__()
-        self.file = os.path.abspath(kwargs.get("file"))
+        self.file = self._abspath(kwargs.get("file"))
+        self.tee = kwargs.get("tee")
         self.pubkey = os.path.abspath(kwargs.get("pubkey"))
-        self.signature = os.path.abspath(kwargs.get("signature"))
-        self.x509 = crypto.X509()
-        self.file_data = None
+        self.signature = self._abspath(kwargs.get("signature"))
+        self.buffer_size = kwargs.get("buffer_size")
+        self.cache = kwargs.get("cache")
+        self.tree = kwargs.get("tree") or False
+        self.leaf_size = kwargs.get("leaf_size")
+        self.workers = kwargs.get("workers")
+        self.verbose = kwargs.get("verbose", True)
+        self.progress = kwargs.get("progress")
+        self.cancel = kwargs.get("cancel")
         self.signature_data = None
         self.pubkey_data = None
+        self.pkey = None
+        self.verified = False
 
-    def _load_file(self):
+    @staticmethod
+    def _abspath(path):
         """
-        Loads file to be verified
+        Absolute path of an optional file (`-`, stdin, is kept)
         """
-        with open(self.file, "rb") as f_data:
-            self.file_data = f_data.read()
+        return os.path.abspath(path) if path not in (None, "-") else path
+
+    def _hash_file(self, file) -> bytes:
+        """
+        Stream a file to be verified through sha256,
+        returning its binary digest. The file content
+        is never held in memory. A `-` file is read from stdin
+        and copied to :data:`tee`, if any, in the same pass
+        """
+        with open(self.tee, "wb") if self.tee else nullcontext() as tee:
+            hasher = Hasher(
+                file=file,
+                stream=sys.stdin.buffer if file == "-" else None,
+                tee=tee,
+                buffer_size=self.buffer_size,
+                cache=self.cache,
+                progress=self.progress,
+                cancel=self.cancel,
+            )
+            return hasher.digest()
 
     def _load_signature(self):
         """
@@ -86,33 +175,166 @@ class Verifyer:
         """
         Build verification before verify itself
         """
-        self._load_file()
-        self._load_signature()
+        if self.signature is not None:
+            self._load_signature()
         self._load_public_key()
 
-        # convert string to bytes
+        # convert string to bytes and get
+        # the (maybe already) parsed key
         pub_key_data_bytes = str.encode(self.pubkey_data)
+        self.pkey = load_public_key(pub_key_data_bytes)
+
+    def _check(self, file, signature_data):
+        """
+        Verify a file against a signature, raising
+        :class:`InvalidSignature` if it's not valid.
+
+        The file is streamed through sha256 and the ECDSA (secp256k1)
+        signature is checked against the resulting digest, the same
+        check made by `openssl dgst -sha256 -verify`
+        """
+        if self.tree:
+            self._check_tree(file, signature_data)
+            return
+
+        digest = self._hash_file(file)
+
+        # the file was already streamed through sha256, so verify
+        # the digest as prehashed instead of hashing raw data again.
+        # It will return :data:`None` if signature is correct
+        self.pkey.verify(signature_data, digest, ec.ECDSA(Prehashed(hashes.SHA256())))
+
+    def _check_tree(self, file, signature_data):
+        """
+        Verify a file against a signature of its Merkle tree commitment.
+        When it fails and the `.merkle` sidecar has a valid signed one, the
+        :class:`InvalidSignature` tells which leaves are corrupted
+        """
+        # pylint: disable=import-outside-toplevel
+        from utils.merkle import MerkleHasher, MerkleTree
+
+        sidecar = f"{file}.merkle"
+        known = None
+
+        # the sidecar is optional and untrusted: a broken one
+        # only means corrupted chunks can't be told
+        if os.path.isfile(sidecar):
+            try:
+                known = MerkleTree.load(sidecar)
+            except (ValueError, OSError) as exc:
+                if self.verbose:
+                    print(f"Ignoring {sidecar}: {exc}")
 
-        # Set public key
-        pkey = crypto.load_publickey(crypto.FILETYPE_PEM, pub_key_data_bytes)
-        self.x509.set_pubkey(pkey)
+        merkle_hasher = MerkleHasher(
+            file=file,
+            leaf_size=self.leaf_size or (known.leaf_size if known else None),
+            buffer_size=self.buffer_size,
+            cache=self.cache,
+            workers=self.workers,
+            progress=self.progress,
+            cancel=self.cancel,
+        )
+        tree = merkle_hasher.tree()
+        algorithm = ec.ECDSA(Prehashed(hashes.SHA256()))
+
+        try:
+            self.pkey.verify(signature_data, tree.commitment, algorithm)
+        except InvalidSignature:
+            if known is None or known.leaf_size != tree.leaf_size:
+                raise
+
+            # the sidecar is only trusted if its own commitment (leaf
+            # size included) is signed; if not, this raises a plain
+            # InvalidSignature
+            self.pkey.verify(signature_data, known.commitment, algorithm)
+            raise InvalidSignature(
+                self._format_corrupted(tree.corrupted(known), tree)
+            ) from None
+
+    @staticmethod
+    def _format_corrupted(corrupted, tree) -> str:
+        """
+        Describe corrupted leaves as ranges, like `Corrupted
+        chunks of 4194304 bytes: 3, 7-9 (4 of 48)`
+        """
+        ranges = []
+        for index in corrupted:
+            if ranges and ranges[-1][1] == index - 1:
+                ranges[-1][1] = index
+            else:
+                ranges.append([index, index])
+
+        chunks = ", ".join(
+            str(first) if first == last else f"{first}-{last}" for first, last in ranges
+        )
+        return " ".join(
+            [
+                f"Corrupted chunks of {tree.leaf_size} bytes: {chunks}",
+                f"({len(corrupted)} of {len(tree.leaves)})",
+            ]
+        )
+
+    @staticmethod
+    def _invalid_message(exc) -> str:
+        """
+        Message of an :class:`InvalidSignature`, with its details if any
+        """
+        msg = "Something wrong is not correct:\n\tInvalid signature"
+        return f"{msg}\n\t{exc}" if str(exc) else msg
+
+    def check(self, file, signature) -> tuple:
+        """
+        Verify a file against a signature file with the built
+        public key, returning a tuple `(verified, message)`.
+        It do not change the Verifyer, so it's safe to call
+        from many threads
+        """
+        try:
+            with open(signature, "rb") as f_data:
+                signature_data = f_data.read()
+            self._check(os.path.abspath(file), signature_data)
+            return (True, "Signature verified with success")
+
+        except InvalidSignature as exc:
+            return (False, self._invalid_message(exc))
+
+        # pylint: disable=broad-exception-caught
+        except Exception as exc:
+            return (False, f"Something wrong is not correct:\n\t{exc}")
+
+    def verify_many(self, files, signatures, workers=1) -> list:
+        """
+        Verify many files against their signature files, all with the
+        built public key, returning a list of `(verified, message)`
+        in the same order of :data:`files`
+        """
+        if self.pkey is None:
+            self.build()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.check, files, signatures))
 
     def verify(self) -> str:
         """
-        Use :module:`OpenSSl.crypto` to verify a
-        the authenticity of a file with given both
-        signature and public key
+        Verify the authenticity of a file with given both
+        signature and public key.
         """
         msg = ""
+        self.verified = False
         try:
-            # Now verify
-            # According de documentation found in
-            # https://pyopenssl.org/en/stable/api/crypto.html#OpenSSL.crypto.verify
-            # it will return :data:`None` if signature is correct
-            print("Verifying...")
-            crypto.verify(self.x509, self.signature_data, self.file_data, "sha256")
+            if self.verbose:
+                print("Verifying...")
+            self._check(self.file, self.signature_data)
+            self.verified = True
             msg = "Signature verified with success"
 
+        except InvalidSignature as exc:
+            msg = self._invalid_message(exc)
+
+        # a cancelled verification has no result
+        except HashCancelled:
+            raise
+
         # pylint: disable=broad-exception-caught
         except Exception as exc:
             msg = f"Something wrong is not correct:\n\t{exc}"
@@ -22,19 +22,27 @@
 """
 This python script is a tool to create air-gapped signatures of files using
 a Krux device and convert hex publics exported from Krux to PEM public keys.
+
+Only argument parsing is done at module level: each command imports what
+it needs when it runs, so `verify` (or `--version`) never loads
+OpenCV nor :module:`qrcode`, only needed by `sign`.
 """
 
 ####################
 # Standart libraries
 ####################
+import os
+import sys
 import argparse
 
 #################
 # Local libraries
 #################
-from utils.constants import KSIGNER_VERSION, KSIGNER_CLI_DESCRIPTION
-from cli.signer import Signer
-from cli.verifyer import Verifyer
+from utils.constants import (
+    KSIGNER_VERSION,
+    KSIGNER_CLI_DESCRIPTION,
+    KSIGNER_EXTRA_DIGESTS,
+)
 
 ################
 # Command parser
@@ -53,7 +61,37 @@ subparsers = parser.add_subparsers(help="sub-command help", dest="command")
 
 # Sign subparser commmand
 signer = subparsers.add_parser("sign", help="sign a file")
-signer.add_argument("-f", "--file", help="path to file to sign")
+signer_input = signer.add_mutually_exclusive_group(required=True)
+signer_input.add_argument(
+    "-f", "--file", help="path to file to sign, or - to read it from stdin"
+)
+signer_input.add_argument(
+    "-m",
+    "--manifest",
+    help=" ".join(
+        [
+            "directory or glob pattern of files to be hashed",
+            "into a single SHA256SUMS manifest, signed once",
+        ]
+    ),
+)
+signer.add_argument(
+    "--tee",
+    help=" ".join(
+        [
+            "copy the file to this path while it's hashed, e.g., to save what",
+            "is read from stdin; output files are named after it",
+        ]
+    ),
+)
+signer.add_argument(
+    "--hash-file",
+    help="path of the sha256sum file (default: <file>.sha256sum.txt)",
+)
+signer.add_argument(
+    "--sig-file",
+    help="path of the signature file (default: <file>.sig)",
+)
 signer.add_argument(
     "-o",
     "--owner",
@@ -66,15 +104,391 @@ signer.add_argument(
     action="store_true",
     help="flag to create a uncompreesed public key (default: False)",
 )
+signer.add_argument(
+    "-b",
+    "--buffer-size",
+    type=int,
+    help="size, in bytes, of the buffer used to hash the file (default: 1048576)",
+    default=None,
+)
+signer.add_argument(
+    "-d",
+    "--digest",
+    action="append",
+    choices=KSIGNER_EXTRA_DIGESTS,
+    help=" ".join(
+        [
+            "other digest saved in a <file>.<digest>sum.txt file, computed in the",
+            "same read pass than sha256; can be repeated (default: only sha256)",
+        ]
+    ),
+    default=None,
+)
+signer.add_argument(
+    "--digest-threads",
+    action="store_true",
+    help="compute each digest on its own thread while reading (default: False)",
+)
+signer.add_argument(
+    "--tree",
+    action="store_true",
+    help=" ".join(
+        [
+            "sign the commitment of a Merkle tree of file, with leaves hashed in",
+            "parallel processes and saved in a <file>.merkle file (default: False)",
+        ]
+    ),
+)
+signer.add_argument(
+    "--leaf-size",
+    type=int,
+    help="size, in bytes, of each Merkle tree leaf with --tree (default: 4194304)",
+    default=None,
+)
+signer.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    help=" ".join(
+        [
+            "number of files hashed in parallel with --manifest,",
+            "or of hashing processes with --tree (default: number of cpus)",
+        ]
+    ),
+    default=None,
+)
+signer.add_argument(
+    "--sig-image",
+    help=" ".join(
+        [
+            "image, video or directory of frames with",
+            "the signature QR code (default: scan with camera)",
+        ]
+    ),
+)
+signer.add_argument(
+    "--pubkey-image",
+    help=" ".join(
+        [
+            "image, video or directory of frames with",
+            "the public key QR code (default: scan with camera)",
+        ]
+    ),
+)
+signer.add_argument(
+    "--no-progress",
+    action="store_true",
+    help="do not show a progress bar while hashing (default: shown on terminals)",
+)
+signer.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="do not use the persistent cache of already hashed files (default: False)",
+)
+signer.add_argument(
+    "--verbose",
+    action="store_true",
+    help="show more information, like digest cache hit rate (default: False)",
+)
 
 # Verify subparsercommand
 verifier = subparsers.add_parser("verify", help="verify signature")
-verifier.add_argument("-f", "--file", help="path to file to verify")
+verifier_input = verifier.add_mutually_exclusive_group(required=True)
+verifier_input.add_argument(
+    "-f", "--file", help="path to file to verify, or - to read it from stdin"
+)
+verifier_input.add_argument(
+    "--batch",
+    help="directory where every file 'X' is verified against its 'X.sig'",
+)
 verifier.add_argument("-s", "--sig-file", help="path to signature file")
 verifier.add_argument("-p", "--pub-file", help="path to pubkey file")
+verifier.add_argument(
+    "--tee",
+    help="copy the file to this path while it's hashed, e.g., to save what is read from stdin",
+)
+verifier.add_argument(
+    "-b",
+    "--buffer-size",
+    type=int,
+    help="size, in bytes, of the buffer used to hash the file (default: 1048576)",
+    default=None,
+)
+verifier.add_argument(
+    "--tree",
+    action="store_true",
+    help=" ".join(
+        [
+            "verify the commitment of a Merkle tree of file, with leaves hashed in",
+            "parallel processes; <file>.merkle tells corrupted leaves (default: False)",
+        ]
+    ),
+)
+verifier.add_argument(
+    "--leaf-size",
+    type=int,
+    help=" ".join(
+        [
+            "size, in bytes, of each Merkle tree leaf with --tree",
+            "(default: the one of <file>.merkle, or 4194304)",
+        ]
+    ),
+    default=None,
+)
+verifier.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    help=" ".join(
+        [
+            "number of files verified in parallel with --batch,",
+            "or of hashing processes with --tree (default: number of cpus)",
+        ]
+    ),
+    default=None,
+)
+verifier.add_argument(
+    "--no-progress",
+    action="store_true",
+    help="do not show a progress bar while hashing (default: shown on terminals)",
+)
+verifier.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="do not use the persistent cache of already verified files (default: False)",
+)
+verifier.add_argument(
+    "--verbose",
+    action="store_true",
+    help="show more information, like digest cache hit rate (default: False)",
+)
+
+
+# Commands import their modules when run
+# pylint: disable=import-outside-toplevel
+def same_file(first, second) -> bool:
+    """
+    True if both paths are the same file, even
+    through links, or would be once created
+    """
+    if os.path.exists(first) and os.path.exists(second):
+        return os.path.samefile(first, second)
+    return os.path.abspath(first) == os.path.abspath(second)
+
+
+def args_error(_args):
+    """
+    Return why options of a command can't be used
+    together, or :data:`None` if they can
+    """
+    signing = _args.command == "sign"
+    stdin = _args.file == "-"
+    # without --tee, a stream has no name for output files
+    unnamed = stdin and _args.tee is None
+    # only sign has these ones
+    sig_image = getattr(_args, "sig_image", None)
+    pubkey_image = getattr(_args, "pubkey_image", None)
+
+    # (condition, error), the first true condition is reported
+    errors = (
+        (
+            sig_image and not os.path.exists(sig_image),
+            f"argument --sig-image: no such file or directory: '{sig_image}'",
+        ),
+        (
+            pubkey_image and not os.path.exists(pubkey_image),
+            f"argument --pubkey-image: no such file or directory: '{pubkey_image}'",
+        ),
+        (
+            _args.tee and _args.file and not stdin and same_file(_args.tee, _args.file),
+            "argument --tee: can't be the same file as -f/--file",
+        ),
+        (
+            not signing and _args.batch and not _args.pub_file,
+            "argument --batch: requires -p/--pub-file",
+        ),
+        (
+            not signing and _args.batch and _args.sig_file,
+            "argument -s/--sig-file: not allowed with argument --batch",
+        ),
+        (
+            _args.tree and signing and _args.digest,
+            "argument --tree: not allowed with argument -d/--digest",
+        ),
+        (
+            _args.tree and not signing and _args.batch,
+            "argument --tree: not allowed with argument --batch",
+        ),
+        (
+            _args.tree and stdin,
+            "argument --tree: not allowed with -f - (stdin)",
+        ),
+        (
+            _args.tree and _args.tee,
+            "argument --tree: not allowed with argument --tee",
+        ),
+        (
+            signing and unnamed and _args.digest,
+            "argument -d/--digest: with -f - (stdin), --tee is required",
+        ),
+        (
+            signing and unnamed and not (_args.hash_file and _args.sig_file),
+            "argument -f: with - (stdin), --tee or both --hash-file and --sig-file are required",
+        ),
+    )
+    for condition, error in errors:
+        if condition:
+            return error
+
+    return None
+
+
+def make_digest_cache(_args):
+    """
+    Open the persistent digest cache, unless
+    user asked for `--no-cache` or it's unavailable
+    """
+    if _args.no_cache:
+        return None
+
+    import sqlite3
+    from utils.digestcache import DigestCache
+
+    try:
+        return DigestCache()
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Digest cache disabled: {exc}")
+        return None
+
+
+def print_digest_cache_stats(_args, _cache):
+    """
+    Show digest cache statistics with `--verbose`
+    """
+    if _args.verbose and _cache is not None:
+        print(f"Digest cache: {_cache.stats()}")
+
+
+def make_progress(_args, label):
+    """
+    Build a progress bar for terminals, unless
+    user asked for `--no-progress` or output is redirected
+    """
+    if _args.no_progress or not sys.stderr.isatty():
+        return None
+
+    from utils.progress import TerminalProgress
+
+    return TerminalProgress(label=label)
+
+
+def sign(_args):
+    """
+    Sign a file, or a manifest of many files, with Krux
+    """
+    from cli.signer import Signer
+
+    cache = make_digest_cache(_args)
+    manifest = None
+
+    if _args.manifest:
+        from cli.manifest import Manifest
+
+        manifest = Manifest(
+            path=_args.manifest,
+            buffer_size=_args.buffer_size,
+            cache=cache,
+            workers=_args.jobs,
+        )
+
+    file_signer = Signer(
+        file=manifest.output if manifest else _args.file,
+        owner=_args.owner,
+        uncompressed=_args.uncompressed,
+        buffer_size=_args.buffer_size,
+        extra_algorithms=_args.digest,
+        threads=_args.digest_threads,
+        tee=_args.tee,
+        hash_output=_args.hash_file,
+        sig_output=_args.sig_file,
+        tree=_args.tree,
+        leaf_size=_args.leaf_size,
+        workers=_args.jobs,
+        cache=cache,
+        progress=make_progress(_args, "Hashing") if not _args.manifest else None,
+        sig_image=_args.sig_image,
+        pubkey_image=_args.pubkey_image,
+    )
+
+    # files written by signer must never be listed in the manifest
+    if manifest:
+        try:
+            manifest.save(skip=file_signer.outputs())
+        except FileNotFoundError as exc:
+            signer.error(f"argument -m/--manifest: {exc}")
+
+    # a QR code that can't be scanned or decoded
+    # is a user error, not a crash
+    try:
+        file_signer.sign()
+        file_signer.make_pubkey_certificate()
+    except (ValueError, OSError) as exc:
+        signer.error(str(exc))
+    print_digest_cache_stats(_args, cache)
+
+
+def verify_batch(_args) -> bool:
+    """
+    Verify every file of a directory against its signature
+    """
+    from cli.batch import BatchVerifyer
+
+    cache = make_digest_cache(_args)
+    batch = BatchVerifyer(
+        path=_args.batch,
+        pubkey=_args.pub_file,
+        buffer_size=_args.buffer_size,
+        cache=cache,
+        workers=_args.jobs,
+    )
+    verified = batch.verify()
+    print_digest_cache_stats(_args, cache)
+    return verified
+
+
+def verify(_args):
+    """
+    Verify a file against its signature
+    """
+    from cli.verifyer import Verifyer
+
+    cache = make_digest_cache(_args)
+    verifyer = Verifyer(
+        file=_args.file,
+        pubkey=_args.pub_file,
+        signature=_args.sig_file,
+        tee=_args.tee,
+        buffer_size=_args.buffer_size,
+        tree=_args.tree,
+        leaf_size=_args.leaf_size,
+        workers=_args.jobs,
+        cache=cache,
+        progress=make_progress(_args, "Verifying"),
+    )
+    verifyer.build()
+    result = verifyer.verify()
+    print(result)
+    print_digest_cache_stats(_args, cache)
 
 
 if __name__ == "__main__":
+    # --tree hashes on worker processes, which a frozen (pyinstaller)
+    # binary must be able to start; only then multiprocessing is imported
+    if getattr(sys, "frozen", False):
+        from multiprocessing import freeze_support
+
+        freeze_support()
+
     # parse arguments
     args = parser.parse_args()
 
@@ -87,23 +501,26 @@ if __name__ == "__main__":
         parser.print_help()
 
     # on ksigner-cli sign --file <some file> [--owner <some owner>]
+    # or ksigner-cli sign --manifest <some dir|glob> [--owner <some owner>]
+    elif args.command == "sign" and args_error(args):
+        signer.error(args_error(args))
+
     elif args.command == "sign":
-        signer = Signer(
-            file=args.file, owner=args.owner, uncompressed=args.uncompressed
-        )
-        signer.sign()
-        signer.make_pubkey_certificate()
+        sign(args)
 
     # on ksigner-cli verify \
     #                --file <some file> \
     #                --sig-file <some sig file> \
     #                --pub-file <some pub file>
+    # or ksigner-cli verify \
+    #                --batch <some dir> \
+    #                --pub-file <some pub file>
+    elif args.command == "verify" and args_error(args):
+        verifier.error(args_error(args))
+
+    elif args.command == "verify" and args.batch:
+        if not verify_batch(args):
+            sys.exit(1)
+
     elif args.command == "verify":
-        verifyer = Verifyer(
-            file=args.file,
-            pubkey=args.pub_file,
-            signature=args.sig_file,
-        )
-        verifyer.build()
-        result = verifyer.verify()
-        print(result)
+        verify(args)
@@ -26,12 +26,19 @@ ksigner-gui.py
 A simple Graphical User Interface built with kivy
 """
 import os
+import time
+
+# Taken before any kivy import, to log
+# the time to draw the first frame
+STARTED_AT = time.perf_counter()
+
+# pylint: disable=wrong-import-position
 
 #######################
 # Third party libraries
 #######################
 from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager
+from kivy.clock import Clock
 from kivy.cache import Cache
 from kivy.core.text import LabelBase
 from kivysome.iconfonts import register
@@ -39,13 +46,10 @@ from kivysome.iconfonts import register
 #################
 # Local libraries
 #################
-from utils.info import info
+from utils.constants import KSIGNER_QR_CACHE_SIZE
 from utils.klogger import KLogger
-from screens.main import MainScreen
-from screens.sign import SignScreen
-from screens.verify import VerifyScreen
-from screens.qrcode import QRCodeScreen
-from screens.scan import ScanScreen
+from screens.manager import LazyScreenManager
+from screens.camera import CameraService
 
 
 class KSignerApp(App, KLogger):
@@ -53,6 +57,11 @@ class KSignerApp(App, KLogger):
     KSignerApp is the Root widget
     """
 
+    time_to_first_frame = None
+    """
+    Seconds, since the start of process, to draw the first frame
+    """
+
     def _register_font(self, **kwargs):
         """
         Register a font located at :path:`fonts`
@@ -60,8 +69,7 @@ class KSignerApp(App, KLogger):
         font_name = kwargs.get("font_name")
         root_path = os.path.abspath(os.path.dirname(__file__))
         font_path = f"{root_path}/{font_name}.ttf"
-        msg = f"{info()}: Registering font '{font_name}' at {font_path}"
-        self.debug(msg)
+        self.debug("Registering font '%s' at %s", font_name, font_path)
 
         if font_name.startswith("fa"):
             fontd_path = f"{root_path}/{font_name}.fontd"
@@ -77,25 +85,42 @@ class KSignerApp(App, KLogger):
         cache_args = {"limit": 10, "timeout": 300}
         Cache.register(cache_name, **cache_args)
 
-    def _register_screens(self) -> ScreenManager:
+        # QRCode textures, to display again a hash
+        # without rebuilding its matrix and texture
+        Cache.register("ksigner-qrcode", limit=KSIGNER_QR_CACHE_SIZE)
+
+    def _register_screens(self) -> LazyScreenManager:
         """
-        Register many screens to :class:`ScreenManager`
+        Register many screens to :class:`LazyScreenManager`.
+        Only the main screen is built now, others are
+        imported and built on first navigation
         """
-        screen_manager = ScreenManager()
-        screens = (
-            MainScreen(name="main"),
-            SignScreen(name="sign"),
-            VerifyScreen(name="verify"),
-            QRCodeScreen(name="export-sha256"),
-            ScanScreen(name="import-signature"),
-            ScanScreen(name="import-public-key"),
-        )
-
-        for screen in screens:
-            msg = f"{info()}: adding screen '{screen.name}'"
-            self.debug(msg)
-            screen_manager.add_widget(screen)
-
+        screen_manager = LazyScreenManager()
+
+        # Both scan screens share one camera, paused between scans
+        camera = CameraService()
+        screens = {
+            "main": {"module": "screens.main", "cls": "MainScreen"},
+            "sign": {"module": "screens.sign", "cls": "SignScreen"},
+            "verify": {"module": "screens.verify", "cls": "VerifyScreen"},
+            "export-sha256": {"module": "screens.qrcode", "cls": "QRCodeScreen"},
+            "import-signature": {
+                "module": "screens.scan",
+                "cls": "ScanScreen",
+                "camera": camera,
+            },
+            "import-public-key": {
+                "module": "screens.scan",
+                "cls": "ScanScreen",
+                "camera": camera,
+            },
+        }
+
+        for name, kwargs in screens.items():
+            self.debug("adding screen '%s'", name)
+            screen_manager.register(name, **kwargs)
+
+        screen_manager.current = "main"
         return screen_manager
 
     def build(self):
@@ -108,6 +133,21 @@ class KSignerApp(App, KLogger):
         self._register_cacher()
         return self._register_screens()
 
+    def on_start(self):
+        """
+        Event fired after :meth:`build`, before
+        the first frame is drawn
+        """
+        Clock.schedule_once(self._on_first_frame)
+
+    # pylint: disable=unused-argument
+    def _on_first_frame(self, *args):
+        """
+        Log the cold start time, from process start to first frame
+        """
+        self.time_to_first_frame = time.perf_counter() - STARTED_AT
+        self.info("first frame in %.3fs", self.time_to_first_frame)
+
 
 if __name__ == "__main__":
     app = KSignerApp()
@@ -109,8 +109,15 @@ class ActionerScreen(Screen, KLogger):
         alpha = kwargs.get("a")
 
         # Log first
-        msg = f"<Button::{name}> {_id}.background_color=({red},{green},{blue},{alpha})"
-        self.debug(msg)
+        self.debug(
+            "<Button::%s> %s.background_color=(%s,%s,%s,%s)",
+            name,
+            _id,
+            red,
+            green,
+            blue,
+            alpha,
+        )
 
         # set after
         widget = self.ids[_id]
@@ -129,8 +136,7 @@ class ActionerScreen(Screen, KLogger):
         name = kwargs.get("name")
         direction = kwargs.get("direction")
 
-        msg = f"Switching to screen='{name}' by direction='{direction}'"
-        self.debug(msg)
+        self.debug("Switching to screen='%s' by direction='%s'", name, direction)
         self.manager.transition.direction = direction
         self.manager.current = name
 
@@ -145,8 +151,7 @@ class ActionerScreen(Screen, KLogger):
             :param:`id` the kivy id of widget
         """
         _id = kwargs.get("id")
-        msg = f"<Button::{_id}> clicked"
-        self.info(msg)
+        self.info("<Button::%s> clicked", _id)
         self._set_background(name=self.name, id=_id, r=0.5, g=0.5, b=0.5, a=0.5)
 
     def _on_release(self, **kwargs):
@@ -160,8 +165,7 @@ class ActionerScreen(Screen, KLogger):
             :param:`id` the kivy id of widget
         """
         _id = kwargs.get("id")
-        msg = f"<Button::{_id}> released"
-        self.info(msg)
+        self.info("<Button::%s> released", _id)
         self._set_background(name=self.name, id=_id, r=0, b=0, g=0, a=0)
 
     def _make_label(self, **kwargs):
@@ -176,8 +180,7 @@ class ActionerScreen(Screen, KLogger):
 
         _text = kwargs.get("text")
         _type = kwargs.get("type")
-        msg = f"building '{_type}' label='{_text}'"
-        self.debug(msg)
+        self.debug("building '%s' label='%s'", _type, _text)
         __kwargs__ = self.base_label_kwargs
         __kwargs__["text"] = _text
         __kwargs__["color"] = self.fill_color
@@ -192,8 +195,7 @@ class ActionerScreen(Screen, KLogger):
             msg = f"Invalid type '{_type}'"
             raise ValueError(msg)
 
-        msg = "label args: %s" % __kwargs__
-        self.debug(msg)
+        self.debug("label args: %s", __kwargs__)
         return Label(**__kwargs__)
 
     def _keyboard_closed(self):
@@ -211,7 +213,7 @@ class ActionerScreen(Screen, KLogger):
         If we hit escape, release the keyboard for key in ["escape"]
         """
         if keycode[1] == "enter":
-            msg = f"{keycode[1]} pressed"
+            self.debug("%s pressed", keycode[1])
             if self.manager.current == "sign":
                 self._set_screen(name="main", direction="left")
             elif self.manager.current == "export-sha256":
@@ -222,8 +224,7 @@ class ActionerScreen(Screen, KLogger):
             elif self.manager.current == "import-public-key":
                 self._set_screen(name="sign", direction="left")
             else:
-                msg = f"key '{keycode[1]}' isnt implemented"
-                self.warning(msg)
+                self.warning("key '%s' isnt implemented", keycode[1])
         return True
 
     def _chunk_str(self, msg, size):
@@ -232,8 +233,7 @@ class ActionerScreen(Screen, KLogger):
         Use with sha256 or signature strings.
         """
 
-        _msg = f"chunking {msg} to substrings with len={size}"
-        self.debug(_msg)
+        self.debug("chunking %s to substrings with len=%s", msg, size)
         return "\n".join([msg[i : i + size] for i in range(0, len(msg), size)])
 
     def _build_check_icon(self, **kwargs) -> str:
@@ -273,8 +273,7 @@ class ActionerScreen(Screen, KLogger):
         self.debug("Creating <BoxLayout>")
         _alert_box_popup = BoxLayout(orientation="vertical")
 
-        msg = f"Creating <Label text='{message}'>"
-        self.debug(msg)
+        self.debug("Creating <Label text='%s'>", message)
         _alert_label = Label(text=message, markup=markup)
 
         self.debug("Creating <Button>")
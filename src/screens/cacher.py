@@ -56,12 +56,9 @@ class LoggedCache:
         Do the same as :method:`register` from :class:`Cache`,
         with logs
         """
-        dicts = dict(kwargs)
-        msg = f"LoggedCache: '{name}' setup: {dicts}"
-        Logger.debug(msg)
+        Logger.debug("LoggedCache: '%s' setup: %s", name, kwargs)
         Cache.register(name, **kwargs)
-        msg = f"LoggedCache: '{name}' registered"
-        Logger.info(msg)
+        Logger.info("LoggedCache: '%s' registered", name)
 
     @staticmethod
     def append(reg, key, value):
@@ -69,8 +66,7 @@ class LoggedCache:
         Append a mapped key:value in register cache
         and log its
         """
-        msg = f"LoggedCache: Saving {reg}->{key}={value}"
-        Logger.debug(msg)
+        Logger.debug("LoggedCache: Saving %s->%s=%s", reg, key, value)
         Cache.append(reg, key, value)
 
     @staticmethod
@@ -80,6 +76,5 @@ class LoggedCache:
         and log its
         """
         _value = Cache.get(reg, key)
-        msg = f"LoggedCache: Getting {reg}->{key}={_value}"
-        Logger.debug(msg)
+        Logger.debug("LoggedCache: Getting %s->%s=%s", reg, key, _value)
         return _value
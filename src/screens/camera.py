@@ -0,0 +1,102 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+camera.py
+
+Implements a long-lived camera service, shared
+by all :class:`ScanScreen` instances
+"""
+#################
+# Local libraries
+#################
+from utils.klogger import KLogger
+
+
+class CameraService(KLogger):
+    """
+    CameraService keeps one :class:`ZBarCam` for the whole app.
+
+    The camera stack is imported, the camera opened and its kv rules
+    parsed only once, at the first scan. Between scans it is paused and detached from its
+    screen, never released, so next scans start immediately.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._zbarcam = None
+        self._callback = None
+
+    @property
+    def zbarcam(self):
+        """
+        The shared :class:`ZBarCam`, built on first use
+        """
+        if self._zbarcam is None:
+            # pylint: disable=import-outside-toplevel
+            from kivy_garden.zbarcam import ZBarCam
+
+            self.debug("Creating <ZBarCam>")
+            self._zbarcam = ZBarCam()
+        return self._zbarcam
+
+    def attach(self, parent, callback):
+        """
+        Show the camera on parent widget and resume it,
+        calling callback(instance, symbols) on detected symbols
+        """
+        self.detach()
+        zbarcam = self.zbarcam
+
+        self.debug("Attaching <ZBarCam> to <%s>", parent.__class__.__name__)
+        parent.add_widget(zbarcam)
+
+        # pylint: disable=no-member
+        zbarcam.bind(symbols=callback)
+        self._callback = callback
+        zbarcam.start()
+        return zbarcam
+
+    def detach(self):
+        """
+        Pause the camera and remove it from its parent widget.
+        Safe to be called more than once
+        """
+        if self._zbarcam is None:
+            return
+
+        if self._callback is not None:
+            # pylint: disable=no-member
+            self._zbarcam.unbind(symbols=self._callback)
+            self._callback = None
+
+        self._zbarcam.stop()
+
+        # forget symbols of last scan, so the
+        # same QR code is detected again next time
+        self._zbarcam.symbols = []
+
+        if self._zbarcam.parent is not None:
+            self.debug(
+                "Detaching <ZBarCam> from <%s>",
+                self._zbarcam.parent.__class__.__name__,
+            )
+            self._zbarcam.parent.remove_widget(self._zbarcam)
@@ -0,0 +1,89 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+manager.py
+
+Implements an inherited kivy.uix.screenmanager.ScreenManager
+that builds its screens on first navigation
+"""
+####################
+# Standard libraries
+####################
+from importlib import import_module
+
+################
+# Kivy libraries
+################
+from kivy.uix.screenmanager import ScreenManager
+
+#################
+# Local libraries
+#################
+from utils.klogger import KLogger
+
+
+class LazyScreenManager(ScreenManager, KLogger):
+    """
+    LazyScreenManager only knows, at startup, where each screen is
+    implemented. A screen (and so its module with heavy dependencies,
+    like the camera stack of scan screens or the cryptography of verify screen)
+    is imported and built the first time it is requested
+    with :meth:`get_screen`, i.e, when user navigates to it.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._factories = {}
+
+    def register(self, name, **kwargs):
+        """
+        Register a screen to be built on first navigation
+
+        Kwargs:
+        -------
+            :param:`module` the module where screen is implemented
+            :param:`cls` the class name of screen
+            any other kwarg is given to screen constructor
+        """
+        self.debug("registering screen '%s' from %s", name, kwargs.get("module"))
+        self._factories[name] = kwargs
+
+    def _build_screen(self, name):
+        """
+        Import the module of a registered screen,
+        build and add the screen
+        """
+        kwargs = dict(self._factories[name])
+        module = import_module(kwargs.pop("module"))
+        screen_class = getattr(module, kwargs.pop("cls"))
+
+        self.debug("building screen '%s'", name)
+        self.add_widget(screen_class(name=name, **kwargs))
+
+    def get_screen(self, name):
+        """
+        Return the screen widget associated with the name,
+        building it when not built yet
+        """
+        if name in self._factories and not self.has_screen(name):
+            self._build_screen(name)
+        return super().get_screen(name)
@@ -35,7 +35,6 @@ from threading import Thread
 # Third party libraries
 #######################
 from functools import partial
-from qrcode import QRCode
 from qrcode.constants import ERROR_CORRECT_L
 
 ################
@@ -52,6 +51,7 @@ from kivy.properties import (
     NumericProperty,
     ListProperty,
     ObjectProperty,
+    OptionProperty,
 )
 
 #################
@@ -59,6 +59,7 @@ from kivy.properties import (
 #################
 from screens.actioner import ActionerScreen
 from screens.cacher import LoggedCache
+from utils.qr import make_qr_matrix, make_qr_texture_buffer
 
 
 # pylint: disable=too-many-ancestors
@@ -112,6 +113,15 @@ class QRCodeScreen(ActionerScreen):
     defined at :class:`~qrcode.QRCode`
     """
 
+    colorfmt = OptionProperty("rgb", options=["rgb", "luminance"])
+    """
+    Color format of QRCode texture. A 'luminance' texture
+    uses a single channel, 3x smaller than 'rgb'.
+
+    :data:`colorfmt` is a :class:`~kivy.properties.OptionProperty`,
+    defaulting to `'rgb'`.
+    """
+
     loading_image = StringProperty("data/images/image-loading.gif")
     """
     Intermediate image to be displayed while the widget ios being loaded.
@@ -128,18 +138,42 @@ class QRCodeScreen(ActionerScreen):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._qrcode = None
         self._qrtexture = None
         self._img = None
 
     def on_pre_enter(self, *args):
         """
         Event fired when the screen is about to be used: the entering animation is started.
+
+        A QRCode already displayed is taken from `ksigner-qrcode` cache,
+        otherwise it's generated in another thread
         """
         self.set_label_warn()
         self.set_label_desc()
         self.set_image()
-        Thread(target=partial(self.generate_qrcode)).start()
+
+        key = self._texture_key()
+        texture = LoggedCache.get("ksigner-qrcode", key)
+
+        if texture is not None:
+            self.debug("<Texture> found in cache")
+            self._show_texture(texture)
+        else:
+            Thread(target=partial(self.generate_qrcode, key)).start()
+
+    def _texture_key(self) -> tuple:
+        """
+        Everything that changes how a QRCode texture looks like
+        """
+        return (
+            LoggedCache.get("ksigner", "hash"),
+            self.version,
+            self.ecc,
+            self.box_size,
+            self.border_size,
+            tuple(self.fill_color),
+            self.colorfmt,
+        )
 
     def on_touch_down(self, touch):
         """
@@ -161,8 +195,8 @@ class QRCodeScreen(ActionerScreen):
         }
         self._img = Image(**kwargs)
         self.add_widget(self._img)
-        self.info("QRCodeScreen: <Image> added")
-        self.debug(kwargs)
+        self.info("<Image> added")
+        self.debug("%s", kwargs)
 
     def set_label_warn(self):
         """
@@ -199,38 +233,28 @@ class QRCodeScreen(ActionerScreen):
         self.add_widget(self._label_desc)
         self.info("<Label::description> added")
 
-    def generate_qrcode(self):
+    def generate_qrcode(self, key):
         """
         Setup QRCode
         """
         self.info("Creating qrcode")
-        kwargs = {
-            "version": self.version,
-            "error_correction": self.ecc,
-            "box_size": self.box_size,
-            "border": self.border_size,
-        }
-
-        # add data
-        data = LoggedCache.get("ksigner", "hash")
-        self._qrcode = QRCode(**kwargs)
-        self._qrcode.add_data(data)
-        self._qrcode.make(fit=True)
-        self._update_texture()
+        data, version, ecc, box_size, border = key[:5]
+        matrix = make_qr_matrix(
+            data=data, version=version, ecc=ecc, box_size=box_size, border=border
+        )
+        self._update_texture(matrix, key)
 
     # pylint: disable=unused-argument
     def _create_texture(self, k, delta):
-        self.info("QRCodeScreen: <Texture> creating")
-        self._qrtexture = Texture.create(size=(k, k), colorfmt="rgb")
+        self.info("<Texture> creating")
+        self._qrtexture = Texture.create(size=(k, k), colorfmt=self.colorfmt)
         # don't interpolate texture
         self._qrtexture.min_filter = "nearest"
         self._qrtexture.mag_filter = "nearest"
 
-    def _update_texture(self):
-        matrix = self._qrcode.get_matrix()
+    def _update_texture(self, matrix, key):
         k = len(matrix)
-        msg = f"<Texture::matrix::len>={k}"
-        self.debug(msg)
+        self.debug("<Texture::matrix::len>=%s", k)
 
         # create the texture in main UI thread otherwise
         # this will lead to memory corruption
@@ -240,29 +264,30 @@ class QRCodeScreen(ActionerScreen):
         _color = self.fill_color[:]
         color = (int(_color[0] * 255), int(_color[1] * 255), int(_color[2] * 255))
 
-        # used bytearray for python 3.5 eliminates need for btext
-        buff = bytearray()
-        for row in range(k):
-            for col in range(k):
-                buff.extend([0, 0, 0] if matrix[row][col] else color)
+        # build the whole buffer at once
+        buff = make_qr_texture_buffer(
+            matrix=matrix, color=color, colorfmt=self.colorfmt
+        )
 
-        # then blit the buffer
-        # join not necessary when using a byte array
-        # buff =''.join(map(chr, buff))
-        # update texture in UI thread.
+        # then blit the buffer, in a single
+        # call, in UI thread.
         self.debug("Blitting buffer in <QRCodeScreen@Texture>")
-        Clock.schedule_once(lambda dt: self._upd_texture(buff))
+        Clock.schedule_once(lambda dt: self._upd_texture(buff, key))
 
-    def _upd_texture(self, buff):
+    def _upd_texture(self, buff, key):
         texture = self._qrtexture
 
         if not texture:
             self.warning("Texture hasn't been created")
-            Clock.schedule_once(lambda dt: self._upd_texture(buff))
+            Clock.schedule_once(lambda dt: self._upd_texture(buff, key))
             return
 
-        texture.blit_buffer(buff, colorfmt="rgb", bufferfmt="ubyte")
+        texture.blit_buffer(buff, colorfmt=self.colorfmt, bufferfmt="ubyte")
         texture.flip_vertical()
+        LoggedCache.append("ksigner-qrcode", key, texture)
+        self._show_texture(texture)
+
+    def _show_texture(self, texture):
         self._img.anim_delay = -1
         self._img.texture = texture
         self._img.canvas.ask_update()
@@ -25,20 +25,14 @@ scan.py
 Implements an inherited kivy.uix.screenmanager.Screen
 for scan QRCodes
 """
-import sys
-import os
-
 ################
 # Kivy libraries
 ################
-from kivy.lang import Builder
-from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.button import Button
 from kivy.properties import ObjectProperty
-from kivy_garden.zbarcam import ZBarCam
 
 #################
 # Local libraries
@@ -46,6 +40,7 @@ from kivy_garden.zbarcam import ZBarCam
 from screens.actioner import ActionerScreen
 from screens.cacher import LoggedCache
 from cli.signer import Signer
+from utils.multipart import PartTracker, is_part
 
 
 # pylint: disable=too-many-ancestors
@@ -61,21 +56,44 @@ class ScanScreen(ActionerScreen):
     to set the default position on Screen
     """
 
+    camera = ObjectProperty(None)
+    """
+    :data:`camera` is a :class:`~kivy.properties.ObjectProperty`
+    with the :class:`CameraService` shared by all scan screens
+    """
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         # Widgets
         self._box_layout = None
-        self._zbarcam = None
+        self._progress_label = None
+        self._tracker = PartTracker()
 
     def on_pre_enter(self, *args):
         """
         Event fired when the screen is about to be used: the entering animation is started.
         """
-        self._zbarcam = ZBarCam()
-        self.add_widget(self._zbarcam)
-        self.info("<ZBarCam> added")
-        Clock.schedule_interval(self._decode_qrcode, 1)
+        self._tracker.reset()
+        self._progress_label = Label(
+            text="", size_hint=(1, 0.1), pos_hint={"center_x": 0.5, "y": 0}
+        )
+        self.add_widget(self._progress_label)
+
+        # resume the shared camera and decode as
+        # soon as it detects symbols on a frame
+        self.camera.attach(self, self._decode_qrcode)
+        self.info("<ZBarCam> attached")
+        self.debug("Waiting for qrcode")
+
+    def on_leave(self, *args):
+        """
+        Event fired when the screen was left (by scanning
+        or by user): pause the shared camera
+        """
+        self.camera.detach()
+        self.remove_widget(self._progress_label)
+        self.debug("<ZBarCam> paused")
 
     def _alert(self, **kwargs):
         title = kwargs.get("title")
@@ -86,8 +104,7 @@ class ScanScreen(ActionerScreen):
         _box_popup = BoxLayout(orientation="vertical")
 
         _label_popup = Label(text=message, markup=True)
-        msg = f"Creating <Popup::Label> text='{message}'"
-        self.debug(msg)
+        self.debug("Creating <Popup::Label> text='%s'", message)
 
         self.debug("Adding <Popup::BoxLayout>")
         _box_popup.add_widget(_label_popup)
@@ -109,18 +126,42 @@ class ScanScreen(ActionerScreen):
         self.info("opening <Popup>")
         _popup.open()
 
+    def _scanned_data(self, symbols) -> str:
+        """
+        Data of scanned symbols or, for parts of an animated
+        QR code, the whole payload once all parts were scanned.
+        An invalid part resets the scanned ones
+        """
+        for symbol in symbols:
+            data = symbol.data.decode("UTF-8")
+            if not is_part(data):
+                return data
+
+            # an exception here would escape the kivy callback:
+            # a malformed or mixed part starts the scan again
+            try:
+                if self._tracker.add(data):
+                    scanned, total = self._tracker.progress
+                    self._progress_label.text = f"Scanned {scanned} of {total} parts"
+                    self.debug("captured part %s of %s", scanned, total)
+                    if self._tracker.complete:
+                        return self._tracker.text()
+            except ValueError as exc:
+                self.warning("ignoring scanned parts: %s", exc)
+                self._tracker.reset()
+                self._progress_label.text = ""
+        return ""
+
     # pylint: disable=unused-argument
-    def _decode_qrcode(self, *args):
+    def _decode_qrcode(self, instance, symbols):
         """
-        When camera capture the QRCode, :data:`zbarcam.symbols`
-        will be feeded to :class:`Signer` and saved as `.sig`
-        or `.pem` files. When it occurs, stop scanning
+        Fired whenever :data:`zbarcam.symbols` changes. When camera
+        capture the QRCode, symbols will be feeded to :class:`Signer`
+        and saved as `.sig` or `.pem` files. When it occurs, stop scanning
         """
-        self.debug("Waiting for qrcode")
-        if len(self._zbarcam.symbols) > 0:
-            scanned_data = self._zbarcam.symbols[0].data.decode("UTF-8")
-            msg = f"captured '{scanned_data}'"
-            self.info(msg)
+        scanned_data = self._scanned_data(symbols)
+        if len(scanned_data) > 0:
+            self.info("captured '%s'", scanned_data)
 
             # Get cached data
             file_input = LoggedCache.get("ksigner", "file_input")
@@ -142,32 +183,12 @@ class ScanScreen(ActionerScreen):
                 self._alert(title=title, message=f"{file_input}.pem")
 
             else:
-                msg = f"Invalid screen '{self.manager.screen}'"
-                self.debug(msg)
-
-            self.debug("Unscheduling QRCode decodification")
-            Clock.unschedule(self._decode_qrcode, 1)
-
-            self.debug("Releasing device")
-            # pylint: disable=protected-access
-            self._zbarcam.ids.xcamera._camera._device.release()
-
-            self.debug("Stopping <ZBarCam>")
-            self._zbarcam.stop()  # stop zbarcam
-
-            # unload zbarcam.kv file
-            mod_path = os.path.dirname(sys.modules["kivy_garden.zbarcam"].__file__)
-            zbar_kv_path = os.path.join(mod_path, "zbarcam.kv")
-            msg = f"Unloading '{zbar_kv_path}'"
-            self.debug(msg)
-            Builder.unload_file(zbar_kv_path)
-
-            # unload xcamera.kv file
-            mod_path = os.path.dirname(sys.modules["kivy_garden.xcamera"].__file__)
-            xcam_kv_path = os.path.join(mod_path, "xcamera.kv")
-            msg = f"Unloading '{xcam_kv_path}'"
-            self.debug(msg)
-            Builder.unload_file(xcam_kv_path)
+                self.debug("Invalid screen '%s'", self.manager.screen)
+
+            # Stop decoding now, the camera is paused
+            # when leaving the screen
+            self.debug("Unbinding QRCode decodification")
+            self.camera.detach()
 
             # Now create some glyph icon to button
             _icon = self._build_check_icon(color="00ff00", font_name="fa-regular-6.4.2")
@@ -24,9 +24,17 @@ sign.py
 
 An inherited implementations of kivy.uix.screenmanager Screen    
 """
+####################
+# Standard libraries
+####################
+import os
+import sqlite3
+from threading import Thread, Event
+
 #######################
 # Third party libraries
 #######################
+from kivy.clock import mainthread
 from kivy.core.window import Window
 from kivy.uix.popup import Popup
 
@@ -39,6 +47,9 @@ from kivy.properties import StringProperty, ListProperty
 from screens.actioner import ActionerScreen
 from screens.cacher import LoggedCache
 from utils.filechooser import LoadDialog
+from utils.digestcache import DigestCache
+from utils.hasher import HashCancelled
+from utils.progresspopup import ProgressPopup
 from cli.signer import Signer
 
 
@@ -85,6 +96,9 @@ class SignScreen(ActionerScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        self._digest_cache = None
+        self._hashing = None
+        self._progress_popup = None
         self._content = LoadDialog(
             load=LoadDialog.load,
             cancel=lambda: self._popup.dismiss,
@@ -108,17 +122,12 @@ class SignScreen(ActionerScreen):
             if (x_pos >= 0 and x_pos < export_button.width) and (
                 y_pos >= 0 and y_pos < export_button.height
             ):
-                self.debug(f"Dropped at {window} ({x_pos}, {y_pos})")
+                self.debug("Dropped at %s (%s, %s)", window, x_pos, y_pos)
                 _filename = filename.decode("utf-8")
-                self.info(f"Opening {_filename}")
-
-                self._sign_and_save(file_input=_filename)
+                self.info("Opening %s", _filename)
 
-                # rebuild text with check icon
-                self._rebuild_export_button_text()
-
-                # Change the screen
-                self._set_screen(name="export-sha256", direction="left")
+                # Hash in background, changing the screen once done
+                self._sign_and_save(file_input=_filename, direction="left")
 
         Window.bind(on_drop_file=_on_drop_file_sha256_message)
 
@@ -188,38 +197,117 @@ class SignScreen(ActionerScreen):
         Call :class:`Signer` to open, read and hash
         (sha256sum) a given file and redirect to QRCodeScreen
         """
-        self._sign_and_save(file_input=args[1][0])
-        self._rebuild_export_button_text()
-        msg = "Closing <Popup>"
-        self.info(msg)
+        self.info("Closing <Popup>")
         self._popup.dismiss()
-        self._set_screen(name="export-sha256", direction="right")
+        self._sign_and_save(file_input=args[1][0], direction="right")
 
     def _sign_and_save(self, **kwargs):
         """
-        Save a :data:`key` with :data:`value` in
-        `ksigner` :class:`LoggedCache` register
+        Hash a file in a background thread, showing its progress,
+        so the window keeps responding with big files. Once the
+        digest is ready, go to QRCodeScreen
 
         Params:
         -------
             :param:`file_input`
+            :param:`direction` of transition to QRCodeScreen
         """
         file_input = kwargs.get("file_input")
+        direction = kwargs.get("direction")
+
+        if self._hashing is not None:
+            self.warning("Already hashing a file, ignoring '%s'", file_input)
+            return
+
+        self._hashing = Event()
+        self._progress_popup = ProgressPopup(
+            title=f"Hashing {os.path.basename(file_input)}",
+            on_cancel=self._hashing.set,
+        )
+        self._progress_popup.open()
+
+        signer = Signer(
+            file=file_input,
+            owner=file_input,
+            cache=self._get_digest_cache(),
+            progress=self._progress_popup,
+            cancel=self._hashing,
+        )
+        Thread(target=self._hash_file, args=(signer, direction), daemon=True).start()
+
+    def _hash_file(self, signer, direction):
+        """
+        Hash (streamed, so big files do not fill the memory)
+        and save the .sha256sum file. Runs in background
+        """
+        try:
+            _hash = signer.hash_file()
+            signer.save_hash_file(_hash)
+        except HashCancelled:
+            self._on_hash_cancelled(signer.file)
+        except OSError as exc:
+            self._on_hash_failed(signer.file, exc)
+        else:
+            self._on_hashed(signer.file, _hash, direction)
+
+    def _finish_hashing(self):
+        """
+        Close the progress popup, allowing another file to be hashed
+        """
+        self._progress_popup.dismiss()
+        self._progress_popup = None
+        self._hashing = None
+
+    @mainthread
+    def _on_hashed(self, file_input, _hash, direction):
+        """
+        Cache, on UI thread, the file input, its hash
+        and .sha256sum file, then go to QRCodeScreen
+        """
+        self._finish_hashing()
 
-        # cache file input
         LoggedCache.append("ksigner", "file_input", file_input)
         LoggedCache.append("ksigner", "owner", file_input)
+        LoggedCache.append("ksigner", "hash", _hash)
+        LoggedCache.append("ksigner", "hash_file", f"{file_input}.sha256sum.txt")
 
-        signer = Signer(file=file_input, owner=file_input)
+        if self._digest_cache is not None:
+            self.info("Digest cache: %s", self._digest_cache.stats())
 
-        # Cache the hash in a .sha256sum file
-        _hash = signer.hash_file()
-        LoggedCache.append("ksigner", "hash", _hash)
+        # rebuild text with check icon
+        self._rebuild_export_button_text()
+
+        # Change the screen
+        self._set_screen(name="export-sha256", direction=direction)
+
+    @mainthread
+    def _on_hash_cancelled(self, file_input):
+        """
+        Close the progress popup, on UI thread, once cancelled
+        """
+        self._finish_hashing()
+        self.info("Hashing of '%s' cancelled", file_input)
 
-        # Cache the hashed file
-        hash_file = f"{file_input}.sha256sum.txt"
-        LoggedCache.append("ksigner", "hash_file", hash_file)
-        signer.save_hash_file(hash_file)
+    @mainthread
+    def _on_hash_failed(self, file_input, exc):
+        """
+        Close the progress popup, on UI thread, on errors
+        """
+        self._finish_hashing()
+        self.error("Unable to hash '%s': %s", file_input, exc)
+        self.export_sha256_message_text = f"Unable to read {file_input}"
+
+    def _get_digest_cache(self):
+        """
+        Open, once, the persistent :class:`DigestCache`
+        so unchanged files are not hashed again
+        """
+        if self._digest_cache is None:
+            try:
+                self._digest_cache = DigestCache()
+            except (OSError, sqlite3.Error) as exc:
+                self.warning("Digest cache disabled: %s", exc)
+        return self._digest_cache
 
     def _rebuild_export_button_text(self):
         """
@@ -228,4 +316,4 @@ class SignScreen(ActionerScreen):
         """
         _icon = self._build_check_icon(color="00ff00", font_name="fa-regular-6.4.2")
         self.export_sha256_message_text = f"{_icon} File to be signed loaded"
-        self.debug(f"new button text '{self.export_sha256_message_text}'")
+        self.debug("new button text '%s'", self.export_sha256_message_text)
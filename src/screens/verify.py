@@ -25,12 +25,18 @@ verifyscreen.py
 Implements an inherited kivy.uix.screenmanager.Screen
 for verify signature options
 """
+####################
+# Standard libraries
+####################
+import os
+from threading import Thread, Event
+
 #######################
 # Third party libraries
 #######################
+from kivy.clock import mainthread
 from kivy.core.window import Window
 from kivy.uix.popup import Popup
-from kivy.uix.boxlayout import BoxLayout
 
 # pylint: disable=no-name-in-module
 from kivy.properties import StringProperty, ListProperty
@@ -42,6 +48,8 @@ from cli.verifyer import Verifyer
 from screens.actioner import ActionerScreen
 from screens.cacher import LoggedCache
 from utils.filechooser import LoadDialog
+from utils.hasher import HashCancelled
+from utils.progresspopup import ProgressPopup
 
 
 # pylint: disable=too-many-ancestors
@@ -80,6 +88,8 @@ class VerifyScreen(ActionerScreen):
         super().__init__(**kwargs)
         self._load_public_key_popup = None
         self._load_public_key_dialog = None
+        self._verifying = None
+        self._progress_popup = None
         self._set_load_screen_dialog()
         self._set_load_file_popup()
         self._set_load_signature_dialog()
@@ -102,26 +112,20 @@ class VerifyScreen(ActionerScreen):
             if y_pos > 0 and y_pos < vs_file.height:
                 # log some data
                 self.debug(
-                    " ".join(
-                        [
-                            f"{_filename} dropped on",
-                            "'verify_screen_load_file' at position",
-                            f"({x_pos}, {y_pos})",
-                        ]
-                    )
+                    "%s dropped on 'verify_screen_load_file' at position (%s, %s)",
+                    _filename,
+                    x_pos,
+                    y_pos,
                 )
                 self._on_submit_file_to_be_verified(filename=_filename)
 
             # pylint: disable=chained-comparison
             if y_pos > vs_file.height and y_pos < (vs_file.height + vs_sig.height):
                 self.debug(
-                    " ".join(
-                        [
-                            f"{_filename} dropped on",
-                            "'verify_screen_load_signature' at position",
-                            f"({x_pos}, {y_pos})",
-                        ]
-                    )
+                    "%s dropped on 'verify_screen_load_signature' at position (%s, %s)",
+                    _filename,
+                    x_pos,
+                    y_pos,
                 )
                 self._on_submit_signature(filename=_filename)
 
@@ -130,13 +134,10 @@ class VerifyScreen(ActionerScreen):
                 vs_file.height + vs_sig.height + vs_pub.height
             ):
                 self.debug(
-                    " ".join(
-                        [
-                            f"{_filename} dropped on ",
-                            "'verify_screen_load_pubkey' at position",
-                            f"({x_pos}, {y_pos})",
-                        ]
-                    )
+                    "%s dropped on 'verify_screen_load_pubkey' at position (%s, %s)",
+                    _filename,
+                    x_pos,
+                    y_pos,
                 )
                 self._on_submit_public_key(filename=_filename)
 
@@ -196,7 +197,7 @@ class VerifyScreen(ActionerScreen):
         _icon = self._build_check_icon(color="00ff00", font_name="fa-regular-6.4.2")
         textid = f"{_id}_text"
         setattr(self, textid, f"{_icon} {text}")
-        self.debug(f"new button text '{getattr(self, textid)}'")
+        self.debug("new button text '%s'", getattr(self, textid))
 
     def _on_submit_file_to_be_verified(self, **kwargs):
         """
@@ -258,26 +259,79 @@ class VerifyScreen(ActionerScreen):
             )
 
     def _on_verify(self, **kwargs):
+        """
+        Verify a file in a background thread, showing its progress,
+        so the window keeps responding with big files
+        """
         file = kwargs.get("file")
         sig = kwargs.get("signature")
         pub = kwargs.get("pubkey")
 
-        # Verify
+        if self._verifying is not None:
+            self.warning("Already verifying a file, ignoring '%s'", file)
+            return
+
+        self._verifying = Event()
+        self._progress_popup = ProgressPopup(
+            title=f"Verifying {os.path.basename(file)}",
+            on_cancel=self._verifying.set,
+        )
+        self._progress_popup.open()
+
         self.debug("Building verification")
-        verifyer = Verifyer(file=file, signature=sig, pubkey=pub)
-        verifyer.build()
+        verifyer = Verifyer(
+            file=file,
+            signature=sig,
+            pubkey=pub,
+            verbose=False,
+            progress=self._progress_popup,
+            cancel=self._verifying,
+        )
+        Thread(target=self._verify_file, args=(verifyer,), daemon=True).start()
+
+    def _verify_file(self, verifyer):
+        """
+        Load signature and public key, then verify the file
+        (streamed through sha256). Runs in background
+        """
+        try:
+            verifyer.build()
+            result = verifyer.verify()
+        except HashCancelled:
+            self._on_verify_cancelled(verifyer.file)
+        # pylint: disable=broad-exception-caught
+        except Exception as exc:
+            self._on_verified(f"Something wrong is not correct:\n\t{exc}")
+        else:
+            self._on_verified(result)
 
-        result = verifyer.verify()
-        msg = f"verification result: {result}"
-        self.info(msg)
+    def _finish_verifying(self):
+        """
+        Close the progress popup, allowing another verification
+        """
+        self._progress_popup.dismiss()
+        self._progress_popup = None
+        self._verifying = None
 
-        # Verification popup
-        self.debug("Creating <BoxLayout> for <Popup>")
-        _verification_box_popup = BoxLayout(orientation="vertical")
+    @mainthread
+    def _on_verified(self, result):
+        """
+        Show, on UI thread, the verification result
+        """
+        self._finish_verifying()
+        self.info("verification result: %s", result)
 
         # show an alert
         self._make_alert(title="Verification result", message=result, markup=True)
 
+    @mainthread
+    def _on_verify_cancelled(self, file):
+        """
+        Close the progress popup, on UI thread, once cancelled
+        """
+        self._finish_verifying()
+        self.info("Verification of '%s' cancelled", file)
+
     def on_press_load_file(self):
         """
         Change background color of :data:`verify_screen_load_file_button` widget
@@ -301,8 +355,7 @@ class VerifyScreen(ActionerScreen):
         self._on_submit_file_to_be_verified(filename=args[1][0])
 
         # Close the popup
-        msg = "Closing <Popup>"
-        self.info(msg)
+        self.info("Closing <Popup>")
         self._load_file_popup.dismiss()
 
     def on_press_load_signature(self):
@@ -329,8 +382,7 @@ class VerifyScreen(ActionerScreen):
         self._on_submit_signature(filename=args[1][0])
 
         # Close the popup
-        msg = "Closing <Popup>"
-        self.info(msg)
+        self.info("Closing <Popup>")
         self._load_signature_popup.dismiss()
 
     def on_press_load_pubkey(self):
@@ -357,8 +409,7 @@ class VerifyScreen(ActionerScreen):
         self._on_submit_public_key(filename=args[1][0])
 
         # Close the popup
-        msg = "Closing <Popup>"
-        self.info(msg)
+        self.info("Closing <Popup>")
         self._load_public_key_popup.dismiss()
 
     def on_press_verify(self):
@@ -51,3 +51,28 @@ KSIGNER_CLI_DESCRIPTION = " ".join(
         "base64 format, in a way that signatures can be verified using openssl.",
     ]
 )
+
+# Size, in bytes, of the reused buffer where files are read
+# before being digested (1 MiB). Peak memory used by hashing
+# depends only on this value, never on the size of the file.
+KSIGNER_HASH_BUFFER_SIZE = 1024 * 1024
+
+# Other digests that `sign` can compute in the same read pass
+# than sha256, each one saved in a <file>.<digest>sum.txt file.
+KSIGNER_EXTRA_DIGESTS = ("sha512", "blake2b", "sha3_256")
+
+# Size, in bytes, of each leaf of a Merkle tree (4 MiB). Leaves are
+# hashed in parallel, and a corrupted file is reported leaf by leaf.
+KSIGNER_MERKLE_LEAF_SIZE = 4 * 1024 * 1024
+
+# Maximum number of digests kept in the persistent digest cache;
+# least recently used ones are evicted first.
+KSIGNER_DIGEST_CACHE_MAX_ENTRIES = 4096
+
+# Maximum number of parsed public keys kept in memory
+# to be reused by verifications with the same owner key.
+KSIGNER_PUBKEY_CACHE_SIZE = 16
+
+# Maximum number of QR codes (matrices, ascii and
+# textures) kept in memory to be displayed again.
+KSIGNER_QR_CACHE_SIZE = 16
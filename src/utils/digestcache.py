@@ -0,0 +1,225 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+digestcache.py
+
+Export a :class:`DigestCache` class, a persistent cache of file digests,
+to skip rehashing unchanged files in :class:`Signer` and :class:`Verifyer`.
+"""
+####################
+# Standard libraries
+####################
+import os
+import sys
+import time
+import sqlite3
+from threading import Lock
+
+#################
+# Local libraries
+#################
+from utils.constants import KSIGNER_DIGEST_CACHE_MAX_ENTRIES
+
+
+def user_cache_dir() -> str:
+    """
+    Return the platform specific directory where
+    ksigner can store its caches
+    """
+    if sys.platform.startswith("win"):
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        root = os.path.expanduser("~/Library/Caches")
+    else:
+        root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(root, "ksigner")
+
+
+# pylint: disable=too-many-instance-attributes
+class DigestCache:
+    """
+    DigestCache stores digests in a SQLite database, keyed by
+    the file identity: absolute path, size, mtime_ns, ctime_ns, inode
+    and device. If any of them change, the entry is a miss and the file
+    is hashed again. Least recently used entries are evicted once
+    :data:`max_entries` is reached.
+
+    Besides whole file digests, it stores the leaf hashes of
+    :class:`MerkleTree`, so an unchanged large file is never read again
+    to rebuild its tree. Hashers report, with :meth:`count`, how many
+    bytes were skipped thanks to the cache and how many were read.
+
+    It can be shared between threads.
+
+    Kwargs:
+    -------
+        :param:`path` the database file (default: `digests.sqlite3` in
+            :func:`user_cache_dir`)
+        :param:`max_entries` the maximum number of cached digests
+            (default: :data:`KSIGNER_DIGEST_CACHE_MAX_ENTRIES`)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.path = kwargs.get("path") or os.path.join(
+            user_cache_dir(), "digests.sqlite3"
+        )
+        self.max_entries = kwargs.get("max_entries") or KSIGNER_DIGEST_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.bytes_skipped = 0
+        self.bytes_read = 0
+        self._lock = Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                " ".join(
+                    [
+                        "CREATE TABLE IF NOT EXISTS digests (",
+                        "path TEXT NOT NULL,",
+                        "algorithm TEXT NOT NULL,",
+                        "size INTEGER NOT NULL,",
+                        "mtime_ns INTEGER NOT NULL,",
+                        "ctime_ns INTEGER NOT NULL,",
+                        "inode INTEGER NOT NULL,",
+                        "device INTEGER NOT NULL,",
+                        "digest BLOB NOT NULL,",
+                        "last_used REAL NOT NULL,",
+                        "PRIMARY KEY (path, algorithm))",
+                    ]
+                )
+            )
+
+    @staticmethod
+    def identity(file) -> tuple:
+        """
+        Return the identity of a file as
+        `(path, size, mtime_ns, ctime_ns, inode, device)`
+        """
+        stat = os.stat(file)
+        return (
+            os.path.abspath(file),
+            stat.st_size,
+            stat.st_mtime_ns,
+            stat.st_ctime_ns,
+            stat.st_ino,
+            stat.st_dev,
+        )
+
+    def get(self, identity, algorithm):
+        """
+        Return the cached digest of a file identity
+        or :data:`None` on a miss
+        """
+        path, *stat = identity
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    " ".join(
+                        [
+                            "SELECT size, mtime_ns, ctime_ns, inode, device, digest",
+                            "FROM digests WHERE path = ? AND algorithm = ?",
+                        ]
+                    ),
+                    (path, algorithm),
+                ).fetchone()
+
+                if row is None or list(row[:5]) != stat:
+                    self.misses += 1
+                    return None
+
+                with self._db:
+                    self._db.execute(
+                        " ".join(
+                            [
+                                "UPDATE digests SET last_used = ?",
+                                "WHERE path = ? AND algorithm = ?",
+                            ]
+                        ),
+                        (time.time(), path, algorithm),
+                    )
+                self.hits += 1
+                return bytes(row[5])
+
+            except sqlite3.Error:
+                self.misses += 1
+                return None
+
+    def put(self, identity, algorithm, digest):
+        """
+        Store the digest of a file identity, evicting
+        the least recently used entries if needed
+        """
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO digests VALUES (?,?,?,?,?,?,?,?,?)",
+                        (identity[0], algorithm, *identity[1:], digest, time.time()),
+                    )
+                    self._db.execute(
+                        " ".join(
+                            [
+                                "DELETE FROM digests WHERE rowid NOT IN",
+                                "(SELECT rowid FROM digests",
+                                "ORDER BY last_used DESC LIMIT ?)",
+                            ]
+                        ),
+                        (self.max_entries,),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def count(self, identity, cached):
+        """
+        Account the size of a file identity as skipped, if all
+        its digests were :data:`cached`, or as read bytes
+        """
+        with self._lock:
+            if cached:
+                self.bytes_skipped += identity[1]
+            else:
+                self.bytes_read += identity[1]
+
+    def stats(self) -> str:
+        """
+        Describe hits, misses, hit rate and bytes skipped versus read
+        """
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total > 0 else 0
+        return ", ".join(
+            [
+                f"{self.hits} hits",
+                f"{self.misses} misses ({rate:.1f}% hit rate)",
+                f"{self.bytes_skipped / 1024**2:.1f} MB skipped",
+                f"{self.bytes_read / 1024**2:.1f} MB read",
+            ]
+        )
+
+    def close(self):
+        """
+        Close the database
+        """
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,277 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+hasher.py
+
+Export a :class:`Hasher` class, a streaming hash engine
+to be used by :class:`Signer` and :class:`Verifyer`.
+"""
+####################
+# Standard libraries
+####################
+import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+#################
+# Local libraries
+#################
+from utils.constants import KSIGNER_HASH_BUFFER_SIZE
+from utils.progress import Progress
+
+
+class HashCancelled(Exception):
+    """
+    Raised when hashing is cancelled before the end of file
+    """
+
+
+# pylint: disable=too-many-instance-attributes
+class Hasher:
+    """
+    Hasher digests a file in fixed-size chunks. Every chunk is read
+    with `readinto` into one reused buffer and handed to :module:`hashlib`
+    through a :class:`memoryview`, so no copy is made and the peak memory
+    is the same whatever the file size.
+
+    Many algorithms can be computed from the same read pass, so the
+    file is read only once whatever the number of digests.
+
+    Kwargs:
+    -------
+        :param:`file` the path of file to be hashed
+        :param:`stream` a readable binary stream hashed instead of
+            :data:`file` (e.g., `sys.stdin.buffer`); it's never cached
+        :param:`tee` an optional writable binary stream where every
+            chunk is copied once it's read; the file is then always
+            read, never taken from cache
+        :param:`algorithm` the :module:`hashlib` algorithm (default: 'sha256')
+        :param:`algorithms` all algorithms computed by :meth:`digests`
+            (default: only :data:`algorithm`)
+        :param:`threads` if True, each algorithm is updated on its own
+            worker thread while the next chunk is read (default: False)
+        :param:`buffer_size` size, in bytes, of the read buffer
+            (default: :data:`KSIGNER_HASH_BUFFER_SIZE`)
+        :param:`cache` an optional :class:`DigestCache` to skip unchanged files
+        :param:`progress` an optional progress hook, called after each
+            chunk with a :class:`Progress`
+        :param:`cancel` an optional :class:`threading.Event`; once set,
+            hashing stops raising :class:`HashCancelled`
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.file = kwargs.get("file")
+        self.stream = kwargs.get("stream")
+        self.tee = kwargs.get("tee")
+        self.algorithm = kwargs.get("algorithm") or "sha256"
+        self.algorithms = tuple(kwargs.get("algorithms") or (self.algorithm,))
+        self.threads = kwargs.get("threads") or False
+        self.buffer_size = kwargs.get("buffer_size") or KSIGNER_HASH_BUFFER_SIZE
+        self.cache = kwargs.get("cache")
+        self.progress = kwargs.get("progress")
+        self.cancel = kwargs.get("cancel")
+
+        if self.buffer_size <= 0:
+            raise ValueError(f"Invalid buffer size '{self.buffer_size}'")
+
+        for algorithm in set(self.algorithms) | {self.algorithm}:
+            if algorithm not in hashlib.algorithms_available:
+                raise ValueError(f"Invalid hash algorithm '{algorithm}'")
+
+    def _chunks(self, stream, total, buffers=1):
+        """
+        Read a raw binary :data:`stream` chunk by chunk, yielding
+        :class:`memoryview` slices over :data:`buffers` reused buffers
+        """
+        views = [memoryview(bytearray(self.buffer_size)) for _ in range(buffers)]
+        index = 0
+        done = 0
+        start = time.perf_counter()
+
+        while True:
+            if self.cancel is not None and self.cancel.is_set():
+                raise HashCancelled(f"Hashing of '{self.file}' cancelled")
+
+            size = stream.readinto(views[index])
+            if not size:
+                break
+            if self.tee is not None:
+                self.tee.write(views[index][:size])
+            yield views[index][:size]
+
+            done += size
+            if self.progress is not None:
+                self.progress(Progress(done, total, time.perf_counter() - start))
+            index = (index + 1) % buffers
+
+        # the size of a stream is only known at its end
+        if self.progress is not None and total is None:
+            self.progress(Progress(done, done, time.perf_counter() - start))
+
+    def _update(self, stream, hash_objs, total):
+        """
+        Feed all :data:`hash_objs` with all data from a
+        raw binary :data:`stream`, chunk by chunk
+        """
+        # nobody is listening and only one digest:
+        # keep the loop as tight as possible
+        if (
+            self.progress is None
+            and self.cancel is None
+            and self.tee is None
+            and len(hash_objs) == 1
+        ):
+            view = memoryview(bytearray(self.buffer_size))
+            update = hash_objs[0].update
+            while True:
+                size = stream.readinto(view)
+                if not size:
+                    break
+                update(view[:size])
+            return
+
+        for chunk in self._chunks(stream, total):
+            for hash_obj in hash_objs:
+                hash_obj.update(chunk)
+
+    def _update_threaded(self, stream, hash_objs, total):
+        """
+        Feed all :data:`hash_objs` from a raw binary :data:`stream`,
+        each one on its own worker thread. :module:`hashlib` releases
+        the GIL on large updates, so digests run in parallel while the
+        next chunk is read into a second buffer
+        """
+        workers = [ThreadPoolExecutor(max_workers=1) for _ in hash_objs]
+        pending = []
+
+        try:
+            for chunk in self._chunks(stream, total, buffers=2):
+                # the other buffer is only reused once every
+                # worker is done with it
+                for future in pending:
+                    future.result()
+                pending = [
+                    worker.submit(hash_obj.update, chunk)
+                    for worker, hash_obj in zip(workers, hash_objs)
+                ]
+            for future in pending:
+                future.result()
+        finally:
+            for worker in workers:
+                worker.shutdown(wait=True)
+
+    def _hash(self, algorithms) -> dict:
+        """
+        Stream the file (or :data:`stream`) once through a new
+        :module:`hashlib` object for each one of :data:`algorithms`
+        """
+        hash_objs = [hashlib.new(algorithm) for algorithm in algorithms]
+
+        if self.stream is not None:
+            self._feed(self.stream, hash_objs, None)
+        else:
+            # buffering=0 gives a raw FileIO, so readinto
+            # writes straight into our buffer
+            with open(self.file, "rb", buffering=0) as f_data:
+                total = os.fstat(f_data.fileno()).st_size
+                self._feed(f_data, hash_objs, total)
+
+        return dict(zip(algorithms, hash_objs))
+
+    def _feed(self, stream, hash_objs, total):
+        """
+        Feed all :data:`hash_objs` from :data:`stream`,
+        on worker threads if asked
+        """
+        if self.threads and len(hash_objs) > 1:
+            self._update_threaded(stream, hash_objs, total)
+        else:
+            self._update(stream, hash_objs, total)
+
+    def hash(self):
+        """
+        Stream the file through a new :module:`hashlib` object
+        and return it
+        """
+        return self._hash((self.algorithm,))[self.algorithm]
+
+    def _digests(self, algorithms) -> dict:
+        """
+        Return the binary digests of file for :data:`algorithms`.
+        With a :data:`cache`, only the missing ones are computed,
+        all of them in the same read pass
+        """
+        algorithms = tuple(dict.fromkeys(algorithms))
+
+        # a stream can't be cached, and a tee needs every byte read
+        if self.cache is None or self.stream is not None or self.tee is not None:
+            return {
+                algorithm: hash_obj.digest()
+                for algorithm, hash_obj in self._hash(algorithms).items()
+            }
+
+        identity = self.cache.identity(self.file)
+        digests = {
+            algorithm: self.cache.get(identity, algorithm) for algorithm in algorithms
+        }
+        missing = tuple(a for a, digest in digests.items() if digest is None)
+        self.cache.count(identity, cached=not missing)
+
+        if missing:
+            for algorithm, hash_obj in self._hash(missing).items():
+                digests[algorithm] = hash_obj.digest()
+
+            # do not cache a file that changed while it was hashed
+            if self.cache.identity(self.file) == identity:
+                for algorithm in missing:
+                    self.cache.put(identity, algorithm, digests[algorithm])
+
+        return digests
+
+    def digest(self) -> bytes:
+        """
+        Return the binary digest of file. With a :data:`cache`,
+        an unchanged file is not read again
+        """
+        return self._digests((self.algorithm,))[self.algorithm]
+
+    def hexdigest(self) -> str:
+        """
+        Return the hexadecimal digest of file
+        """
+        return self.digest().hex()
+
+    def digests(self) -> dict:
+        """
+        Return a dict with the binary digest of file
+        for each one of :data:`algorithms`
+        """
+        return self._digests(self.algorithms)
+
+    def hexdigests(self) -> dict:
+        """
+        Return a dict with the hexadecimal digest of file
+        for each one of :data:`algorithms`
+        """
+        return {algorithm: digest.hex() for algorithm, digest in self.digests().items()}
@@ -35,19 +35,27 @@ import os
 #######################
 from kivy.logger import Logger, LOG_LEVELS
 
-#################
-# Local libraries
-#################
-from utils.info import info
-
 
 class KLogger:
     """
     KLogger
 
-    Class to manage logger on kivy classes
+    Class to manage logger on kivy classes.
+
+    The class name, shown before each message, is resolved once per
+    class, when it is defined. Messages are formatted %-style by
+    :class:`Logger` only when their level is enabled, so disabled
+    levels (usually `debug`) cost a single level check::
+
+        self.debug("Switching to screen='%s'", name)
     """
 
+    _log_prefix = "KLogger: "
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._log_prefix = f"{cls.__name__}: "
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if os.environ.get("LOG_LEVEL"):
@@ -56,37 +64,34 @@ class KLogger:
             self.loglevel = LOG_LEVELS["info"]
         Logger.setLevel(self.loglevel)
 
-    def _create_msg(self, msg):
-        """
-        Create the logged message with current
-        class caller
-        """
-        return f"{info()}: {msg}"
-
-    def info(self, msg):
+    def info(self, msg, *args):
         """
         Create the info message with the current
         class caller
         """
-        Logger.info(self._create_msg(msg))
+        if Logger.isEnabledFor(LOG_LEVELS["info"]):
+            Logger.info(self._log_prefix + msg, *args)
 
-    def debug(self, msg):
+    def debug(self, msg, *args):
         """
         Create the debug message with the current
         class caller
         """
-        Logger.debug(self._create_msg(msg))
+        if Logger.isEnabledFor(LOG_LEVELS["debug"]):
+            Logger.debug(self._log_prefix + msg, *args)
 
-    def warning(self, msg):
+    def warning(self, msg, *args):
         """
         Create the warning message with the current
         class caller
         """
-        Logger.warning(self._create_msg(msg))
+        if Logger.isEnabledFor(LOG_LEVELS["warning"]):
+            Logger.warning(self._log_prefix + msg, *args)
 
-    def error(self, msg):
+    def error(self, msg, *args):
         """
         Create the error message with the current
         class caller
         """
-        Logger.error(self._create_msg(msg))
+        if Logger.isEnabledFor(LOG_LEVELS["error"]):
+            Logger.error(self._log_prefix + msg, *args)
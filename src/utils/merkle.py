@@ -0,0 +1,340 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+merkle.py
+
+Export a :class:`MerkleTree` and a :class:`MerkleHasher`, a tree hash
+engine where fixed-size leaves of a file are hashed in parallel by a
+pool of processes, to be used by :class:`Signer` and :class:`Verifyer`
+with very large files.
+
+Leaves and nodes are hashed like RFC 6962 (Certificate Transparency)
+does. Krux does not sign the bare root, which is a sha256 output of a
+crafted message like any other: it signs a :meth:`MerkleTree.commitment`
+that also binds a tree-mode prefix, the leaf size and the file size, so
+a tree signature can never be taken for the signature of a plain file
+(and vice versa).
+"""
+####################
+# Standard libraries
+####################
+import os
+import time
+import struct
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+#################
+# Local libraries
+#################
+from utils.constants import KSIGNER_HASH_BUFFER_SIZE, KSIGNER_MERKLE_LEAF_SIZE
+from utils.hasher import HashCancelled
+from utils.progress import Progress
+
+# RFC 6962 domain separation of leaf and node hashes
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Sidecar header: magic, version, leaf size and file size
+SIDECAR_MAGIC = b"KSMERKLE"
+SIDECAR_VERSION = 1
+SIDECAR_HEADER = struct.Struct(">8sBQQ")
+
+# Signed commitment: prefix, leaf size, file size and root
+COMMITMENT_PREFIX = b"KSMERKLE"
+COMMITMENT_HEADER = struct.Struct(">8sQQ")
+
+# Bytes hashed by each task sent to the pool, so
+# progress and cancel are checked often enough
+TASK_SIZE = 64 * 1024 * 1024
+
+
+def hash_leaves(file, leaf_size, first, count, buffer_size) -> bytes:
+    """
+    Hash :data:`count` leaves of :data:`file`, starting at leaf
+    :data:`first`, returning their concatenated sha256 digests.
+    Runs on a worker process, so it's a module level function
+    """
+    view = memoryview(bytearray(min(buffer_size, leaf_size)))
+    leaves = []
+
+    with open(file, "rb", buffering=0) as f_data:
+        f_data.seek(first * leaf_size)
+        for _ in range(count):
+            leaf = hashlib.sha256(LEAF_PREFIX)
+            left = leaf_size
+            while left:
+                size = f_data.readinto(view[: min(left, len(view))])
+                if not size:
+                    break
+                leaf.update(view[:size])
+                left -= size
+            leaves.append(leaf.digest())
+
+    return b"".join(leaves)
+
+
+def merkle_root(leaves) -> bytes:
+    """
+    Root of a list of leaf hashes. Pairs are hashed level by level and
+    a lone last node is promoted as is, which builds the same tree
+    than RFC 6962 (split at the largest power of two)
+    """
+    if len(leaves) == 0:
+        return hashlib.sha256(b"").digest()
+
+    level = list(leaves)
+    while len(level) > 1:
+        nodes = [
+            hashlib.sha256(NODE_PREFIX + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            nodes.append(level[-1])
+        level = nodes
+
+    return level[0]
+
+
+class MerkleTree:
+    """
+    Leaf hashes of a file, split in leaves of :data:`leaf_size` bytes
+
+    Kwargs:
+    -------
+        :param:`leaf_size` size, in bytes, of each leaf
+        :param:`size` size, in bytes, of the hashed file
+        :param:`leaves` list of leaf hashes (32 bytes each)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.leaf_size = kwargs.get("leaf_size") or KSIGNER_MERKLE_LEAF_SIZE
+        self.size = kwargs.get("size") or 0
+        self.leaves = kwargs.get("leaves") or []
+        self._root = None
+
+    @property
+    def root(self) -> bytes:
+        """
+        The Merkle root, computed once
+        """
+        if self._root is None:
+            self._root = merkle_root(self.leaves)
+        return self._root
+
+    @property
+    def commitment(self) -> bytes:
+        """
+        The digest signed in tree mode: sha256 of a tree-mode
+        prefix, the leaf size, the file size and the root
+        """
+        header = COMMITMENT_HEADER.pack(COMMITMENT_PREFIX, self.leaf_size, self.size)
+        return hashlib.sha256(header + self.root).digest()
+
+    def corrupted(self, other) -> list:
+        """
+        Index of leaves that differ from :data:`other` tree,
+        including the ones only one of trees have
+        """
+        count = max(len(self.leaves), len(other.leaves))
+        return [
+            i
+            for i in range(count)
+            if i >= len(self.leaves)
+            or i >= len(other.leaves)
+            or self.leaves[i] != other.leaves[i]
+        ]
+
+    def save(self, path):
+        """
+        Save the tree in a compact binary sidecar:
+        a fixed header followed by all leaf hashes
+        """
+        with open(path, "wb") as f_data:
+            f_data.write(
+                SIDECAR_HEADER.pack(
+                    SIDECAR_MAGIC, SIDECAR_VERSION, self.leaf_size, self.size
+                )
+            )
+            f_data.write(b"".join(self.leaves))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a tree saved by :meth:`save`
+        """
+        with open(path, "rb") as f_data:
+            data = f_data.read()
+
+        if len(data) < SIDECAR_HEADER.size:
+            raise ValueError(f"Invalid merkle file '{path}'")
+
+        magic, version, leaf_size, size = SIDECAR_HEADER.unpack_from(data)
+        body = data[SIDECAR_HEADER.size :]
+        count = -(-size // leaf_size) if leaf_size else -1
+
+        if (
+            magic != SIDECAR_MAGIC
+            or version != SIDECAR_VERSION
+            or len(body) != count * 32
+        ):
+            raise ValueError(f"Invalid merkle file '{path}'")
+
+        leaves = [body[i : i + 32] for i in range(0, len(body), 32)]
+        return cls(leaf_size=leaf_size, size=size, leaves=leaves)
+
+
+# pylint: disable=too-few-public-methods
+class MerkleHasher:
+    """
+    MerkleHasher splits a file in fixed-size leaves and hashes them in
+    parallel on a pool of processes, so hashing a very large file scales
+    with the number of cpus instead of using only one
+
+    Kwargs:
+    -------
+        :param:`file` the path of file to be hashed
+        :param:`leaf_size` size, in bytes, of each leaf
+            (default: :data:`KSIGNER_MERKLE_LEAF_SIZE`)
+        :param:`workers` number of hashing processes (default: number of cpus)
+        :param:`buffer_size` size, in bytes, of the read buffer of each process
+            (default: :data:`KSIGNER_HASH_BUFFER_SIZE`)
+        :param:`cache` an optional :class:`DigestCache` where leaf hashes
+            are kept, so an unchanged file is not read again
+        :param:`progress` an optional progress hook, called after each
+            task with a :class:`Progress`
+        :param:`cancel` an optional :class:`threading.Event`; once set,
+            hashing stops raising :class:`HashCancelled`
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.file = kwargs.get("file")
+        self.leaf_size = kwargs.get("leaf_size") or KSIGNER_MERKLE_LEAF_SIZE
+        self.workers = kwargs.get("workers") or os.cpu_count() or 1
+        self.buffer_size = kwargs.get("buffer_size") or KSIGNER_HASH_BUFFER_SIZE
+        self.cache = kwargs.get("cache")
+        self.progress = kwargs.get("progress")
+        self.cancel = kwargs.get("cancel")
+
+        if self.leaf_size <= 0:
+            raise ValueError(f"Invalid leaf size '{self.leaf_size}'")
+
+    def _tasks(self, count) -> list:
+        """
+        Split :data:`count` leaves in `(first, count)` tasks
+        """
+        per_task = max(1, TASK_SIZE // self.leaf_size)
+        return [
+            (first, min(per_task, count - first)) for first in range(0, count, per_task)
+        ]
+
+    def _check_cancel(self):
+        """
+        Raise :class:`HashCancelled` once :data:`cancel` is set
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            raise HashCancelled(f"Hashing of '{self.file}' cancelled")
+
+    def _report(self, done, total, start):
+        """
+        Call the progress hook, if any
+        """
+        if self.progress is not None:
+            done = min(done, total)
+            self.progress(Progress(done, total, time.perf_counter() - start))
+
+    def tree(self) -> MerkleTree:
+        """
+        Return the :class:`MerkleTree` of file. With a :data:`cache`,
+        the leaves of an unchanged file are loaded instead of hashed
+        """
+        if self.cache is None:
+            return self._hash_tree()
+
+        # leaves depend on leaf size, so it's part of the key
+        algorithm = f"merkle-sha256-{self.leaf_size}"
+        identity = self.cache.identity(self.file)
+        data = self.cache.get(identity, algorithm)
+        self.cache.count(identity, cached=data is not None)
+
+        if data is not None:
+            return MerkleTree(
+                leaf_size=self.leaf_size,
+                size=identity[1],
+                leaves=[data[i : i + 32] for i in range(0, len(data), 32)],
+            )
+
+        tree = self._hash_tree()
+
+        # do not cache a file that changed while it was hashed
+        if self.cache.identity(self.file) == identity:
+            self.cache.put(identity, algorithm, b"".join(tree.leaves))
+
+        return tree
+
+    def _hash_tree(self) -> MerkleTree:
+        """
+        Hash all leaves of file and return its :class:`MerkleTree`
+        """
+        size = os.path.getsize(self.file)
+        tasks = self._tasks(-(-size // self.leaf_size))
+        results = [b""] * len(tasks)
+        start = time.perf_counter()
+        done = 0
+
+        # a few leaves are not worth spawning processes
+        if self.workers == 1 or len(tasks) <= 1:
+            for index, (first, count) in enumerate(tasks):
+                self._check_cancel()
+                results[index] = hash_leaves(
+                    self.file, self.leaf_size, first, count, self.buffer_size
+                )
+                done += count * self.leaf_size
+                self._report(done, size, start)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(
+                        hash_leaves,
+                        self.file,
+                        self.leaf_size,
+                        first,
+                        count,
+                        self.buffer_size,
+                    ): index
+                    for index, (first, count) in enumerate(tasks)
+                }
+                try:
+                    for future in as_completed(futures):
+                        self._check_cancel()
+                        results[futures[future]] = future.result()
+                        done += tasks[futures[future]][1] * self.leaf_size
+                        self._report(done, size, start)
+                except HashCancelled:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+        data = b"".join(results)
+        leaves = [data[i : i + 32] for i in range(0, len(data), 32)]
+        return MerkleTree(leaf_size=self.leaf_size, size=size, leaves=leaves)
@@ -0,0 +1,204 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+multipart.py
+
+Export a :class:`PartTracker` class, to reassemble payloads
+split in many animated QR codes, in BBQr format, as shown by Krux
+(see https://bbqr.org). To be used by :class:`Scanner` and
+:class:`ScanScreen`.
+"""
+####################
+# Standard libraries
+####################
+import base64
+import zlib
+
+# Every part starts with a header of 8 chars:
+# 'B$', encoding, file type, total and index of part (base 36)
+BBQR_PREFIX = "B$"
+BBQR_HEADER_SIZE = 8
+
+# Encodings: hex, base32 and zlib (raw deflate) + base32
+BBQR_ENCODINGS = ("H", "2", "Z")
+
+# File types given as text; any other (binary) is given
+# base64 encoded, like single QR code signatures
+BBQR_TEXT_TYPES = ("U", "J")
+
+
+def is_part(data) -> bool:
+    """
+    Check if data, scanned from a QR code,
+    is a part of an animated (BBQr) QR code
+    """
+    return (
+        len(data) > BBQR_HEADER_SIZE
+        and data.startswith(BBQR_PREFIX)
+        and data[2] in BBQR_ENCODINGS
+    )
+
+
+# pylint: disable=too-many-instance-attributes
+class PartTracker:
+    """
+    PartTracker collects the parts of an animated QR code. Parts can
+    be scanned in any order and repeated ones are ignored, so the
+    payload is ready as soon as each part was scanned once, without
+    waiting the animation to loop.
+
+    Every part is decoded as it arrives, directly into its slot of one
+    preallocated buffer (all parts, except the last, have the same size),
+    so reassembling never joins nor copies strings of parts.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.encoding = None
+        self.file_type = None
+        self.total = 0
+        self.scanned = set()
+        self._part_size = 0
+        self._size = 0
+        self._buffer = None
+        self._pending = {}
+
+    def reset(self):
+        """
+        Forget scanned parts, to scan another animated QR code
+        """
+        self.encoding = None
+        self.file_type = None
+        self.total = 0
+        self.scanned = set()
+        self._part_size = 0
+        self._size = 0
+        self._buffer = None
+        self._pending = {}
+
+    @property
+    def progress(self) -> tuple:
+        """
+        Scanned parts and total of parts (k of n)
+        """
+        return (len(self.scanned), self.total)
+
+    @property
+    def complete(self) -> bool:
+        """
+        True once each part was scanned
+        """
+        return self.total > 0 and len(self.scanned) == self.total
+
+    def _decode_part(self, body) -> bytes:
+        """
+        Decode the body (without header) of one part
+        """
+        if self.encoding == "H":
+            return bytes.fromhex(body)
+
+        # base32 parts (except the last) have sizes multiple of 8,
+        # so each one can be decoded alone
+        padding = "=" * (-len(body) % 8)
+        return base64.b32decode(body + padding)
+
+    def _write(self, index, chunk):
+        """
+        Write a decoded part into its slot of buffer
+        """
+        start = index * self._part_size
+        if index < self.total - 1 and len(chunk) != self._part_size:
+            raise ValueError(f"Invalid size of part {index + 1} of {self.total}")
+        if len(chunk) > self._part_size:
+            raise ValueError(f"Invalid size of part {index + 1} of {self.total}")
+
+        memoryview(self._buffer)[start : start + len(chunk)] = chunk
+        if index == self.total - 1:
+            self._size = start + len(chunk)
+
+    def add(self, data) -> bool:
+        """
+        Add a scanned part, returning True when it was not scanned yet.
+
+        A part of another animated QR code (different encoding,
+        file type or total of parts) restarts the tracking
+        """
+        if not is_part(data):
+            raise ValueError(f"Not a part of an animated QR code: '{data[:16]}'")
+
+        encoding, file_type = data[2], data[3]
+        total, index = int(data[4:6], 36), int(data[6:8], 36)
+        if total == 0 or index >= total:
+            raise ValueError(f"Invalid part {index + 1} of {total}")
+
+        if (encoding, file_type, total) != (self.encoding, self.file_type, self.total):
+            self.reset()
+            self.encoding, self.file_type, self.total = encoding, file_type, total
+
+        if index in self.scanned:
+            return False
+
+        chunk = self._decode_part(data[BBQR_HEADER_SIZE:])
+
+        # Size of slots is only known from a part that is not the last
+        if self._buffer is None:
+            if index == total - 1 and total > 1:
+                self._pending[index] = chunk
+                self.scanned.add(index)
+                return True
+            self._part_size = len(chunk)
+            self._buffer = bytearray(self._part_size * total)
+            for pending_index, pending_chunk in self._pending.items():
+                self._write(pending_index, pending_chunk)
+            self._pending.clear()
+
+        self._write(index, chunk)
+        self.scanned.add(index)
+        return True
+
+    def payload(self) -> bytearray:
+        """
+        The reassembled (and decompressed) payload
+        """
+        if not self.complete:
+            scanned, total = self.progress
+            raise ValueError(f"Only {scanned} of {total} parts scanned")
+
+        # Shrink, in place, the unused end of the last slot
+        del self._buffer[self._size :]
+
+        if self.encoding == "Z":
+            try:
+                return bytearray(zlib.decompress(self._buffer, wbits=-10))
+            except zlib.error as exc:
+                raise ValueError(f"Invalid compressed payload: {exc}") from exc
+        return self._buffer
+
+    def text(self) -> str:
+        """
+        The reassembled payload as text; binary file types
+        are given base64 encoded
+        """
+        payload = self.payload()
+        if self.file_type in BBQR_TEXT_TYPES:
+            return payload.decode("utf-8")
+        return base64.b64encode(payload).decode("utf-8")
@@ -0,0 +1,171 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+progress.py
+
+Progress hook API of hashing and verification engines
+(:class:`Hasher`, :class:`Signer` and :class:`Verifyer`).
+
+A hook is any callable receiving a :class:`Progress` after each chunk;
+engines only build one when a hook was given, so nobody listening
+costs nothing. :class:`ProgressHook` is the base of rate limited
+listeners, like :class:`TerminalProgress` (`ksigner-cli`)
+and :class:`ProgressPopup` (`ksigner-gui`).
+"""
+####################
+# Standard libraries
+####################
+import sys
+import time
+
+
+class Progress:
+    """
+    Progress of a task over a known number of bytes
+
+    Args:
+    -----
+        :param:`done` bytes done so far
+        :param:`total` total of bytes, or :data:`None` if unknown
+            (e.g., a stream read from stdin)
+        :param:`elapsed` seconds since the task started
+    """
+
+    __slots__ = ("done", "total", "elapsed")
+
+    def __init__(self, done, total, elapsed):
+        self.done = done
+        self.total = total
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self) -> float:
+        """
+        Done fraction, from 0 to 1 (0 while total is unknown)
+        """
+        if self.total is None:
+            return 0.0
+        return self.done / self.total if self.total else 1.0
+
+    @property
+    def rate(self) -> float:
+        """
+        Throughput, in bytes per second
+        """
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """
+        Throughput, in MB (MiB) per second
+        """
+        return self.rate / 1024**2
+
+    @property
+    def eta(self) -> float:
+        """
+        Estimated seconds left, or :data:`None` if unknown
+        """
+        rate = self.rate
+        if self.total is None or rate <= 0:
+            return None
+        return (self.total - self.done) / rate
+
+    @property
+    def finished(self) -> bool:
+        """
+        True once all bytes are done
+        """
+        return self.total is not None and self.done >= self.total
+
+
+class ProgressHook:
+    """
+    Base class of progress listeners. Calling it with a
+    :class:`Progress` shows it with :meth:`show` at most once
+    per :data:`interval` seconds, and always when finished,
+    so even a fast engine never floods a terminal or a window
+    """
+
+    interval = 0.1
+    _last_shown = 0.0
+
+    def __call__(self, progress):
+        now = time.perf_counter()
+        if progress.finished or now - self._last_shown >= self.interval:
+            self._last_shown = now
+            self.show(progress)
+
+    def show(self, progress):
+        """
+        Show a progress; implemented by subclasses
+        """
+        raise NotImplementedError
+
+
+# pylint: disable=too-few-public-methods
+class TerminalProgress(ProgressHook):
+    """
+    A one line progress bar, for terminals
+
+    Kwargs:
+    -------
+        :param:`label` text before the bar
+        :param:`stream` where the bar is written (default: :data:`sys.stderr`)
+        :param:`width` number of chars of the bar (default: 30)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.label = kwargs.get("label") or ""
+        self.stream = kwargs.get("stream") or sys.stderr
+        self.width = kwargs.get("width") or 30
+
+    def show(self, progress):
+        if progress.total is None:
+            line = " ".join(
+                [
+                    self.label,
+                    f"{progress.done / 1024**2:.1f} MB",
+                    f"{progress.mb_per_second:.1f} MB/s",
+                ]
+            )
+            self.stream.write(f"\r{line}")
+            self.stream.flush()
+            return
+
+        filled = int(self.width * progress.fraction)
+        eta = progress.eta
+        eta = f"{eta:.0f}s" if eta is not None else "?"
+        line = " ".join(
+            [
+                self.label,
+                f"[{'#' * filled}{'.' * (self.width - filled)}]",
+                f"{progress.fraction:6.1%}",
+                f"{progress.done / 1024**2:.1f}/{progress.total / 1024**2:.1f} MB",
+                f"{progress.mb_per_second:.1f} MB/s",
+                f"ETA {eta}",
+            ]
+        )
+        end = "\n" if progress.finished else ""
+        self.stream.write(f"\r{line}{end}")
+        self.stream.flush()
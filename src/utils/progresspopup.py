@@ -0,0 +1,96 @@
+# The MIT License (MIT)
+
+# Copyright (c) 2021-2023 Krux contributors
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+progresspopup.py
+
+implements a inherited class of Popup to show
+the progress of long running tasks
+"""
+########################
+# Thirdy party libraries
+########################
+from kivy.clock import mainthread
+from kivy.uix.popup import Popup
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.progressbar import ProgressBar
+from kivy.uix.label import Label
+from kivy.uix.button import Button
+
+#################
+# Local libraries
+#################
+from utils.progress import ProgressHook
+
+
+class ProgressPopup(Popup, ProgressHook):
+    """
+    ProgressPopup
+
+    Class to show, in SignScreen and VerifyScreen, the progress of
+    a task running in background (bytes done, throughput and time
+    left), with a button to cancel it.
+
+    It's a progress hook (see :module:`utils.progress`): the background
+    task calls it, from its thread, with each :class:`Progress`, and the
+    popup is updated on UI thread, at most 10 times per second.
+
+    Kwargs:
+    -------
+        :param:`on_cancel` called (without arguments) when user cancels
+        any other kwarg is given to :class:`Popup`
+    """
+
+    def __init__(self, **kwargs):
+        on_cancel = kwargs.pop("on_cancel", None)
+        kwargs.setdefault("size_hint", (0.9, 0.4))
+        kwargs.setdefault("auto_dismiss", False)
+        super().__init__(**kwargs)
+
+        self._bar = ProgressBar(max=1, value=0)
+        self._label = Label(text="", halign="center")
+        self._button = Button(
+            text="Cancel",
+            size_hint=(1, 0.5),
+            on_release=lambda *args: on_cancel() if on_cancel else None,
+        )
+
+        box = BoxLayout(orientation="vertical")
+        box.add_widget(self._label)
+        box.add_widget(self._bar)
+        box.add_widget(self._button)
+        self.content = box
+
+    @mainthread
+    def show(self, progress):
+        """
+        Show bytes done of total, throughput and time left
+        """
+        eta = progress.eta
+        eta = f"{eta:.0f}s left" if eta is not None else "estimating"
+
+        self._bar.value = progress.fraction
+        self._label.text = " ".join(
+            [
+                f"{progress.done / 1024**2:.1f} of {progress.total / 1024**2:.1f} MB",
+                f"({progress.mb_per_second:.1f} MB/s, {eta})",
+            ]
+        )
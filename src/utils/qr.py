@@ -28,16 +28,81 @@ utility to generate QRcodes
 # Standart libraries
 ####################
 from io import StringIO
+from functools import lru_cache
 
 #######################
 # Thrid party libraries
 #######################
 from qrcode import QRCode
+from qrcode.constants import ERROR_CORRECT_M
+
+#################
+# Local libraries
+#################
+from utils.constants import KSIGNER_QR_CACHE_SIZE
+
+
+@lru_cache(maxsize=KSIGNER_QR_CACHE_SIZE)
+def _cached_qr_matrix(data, version, ecc, box_size, border) -> tuple:
+    """
+    Build (once per arguments) the QR code matrix,
+    as a tuple of rows of bytes, 1 for dark modules
+    """
+    qr_code = QRCode(
+        version=version, error_correction=ecc, box_size=box_size, border=border
+    )
+    qr_code.add_data(data)
+    qr_code.make(fit=True)
+    return tuple(bytes(row) for row in qr_code.get_matrix())
+
+
+@lru_cache(maxsize=KSIGNER_QR_CACHE_SIZE)
+def _cached_qr_ascii(data) -> str:
+    """
+    Build (once per data) the ascii QR code
+    """
+    qr_code = QRCode()
+    qr_code.add_data(data)
+    qr_string = StringIO()
+    qr_code.print_ascii(out=qr_string, invert=True)
+    return qr_string.getvalue()
+
+
+def make_qr_matrix(**kwargs) -> tuple:
+    """
+    Builds the QR code matrix, with border, as a tuple of
+    rows of bytes (1 for dark modules, 0 for light ones).
+
+    The version search of `QRCode.make(fit=True)` is only done
+    once for the same arguments: the most recent matrices are
+    kept in a bounded LRU cache, shared by cli and gui.
+
+    Kwargs:
+    -------
+        :param data
+            The data to be encoded in qrcode
+        :param version
+            The minimal QR code version (default: None, the smallest fit)
+        :param ecc
+            The error correction level (default: `ERROR_CORRECT_M`)
+        :param box_size
+            Pixels per module (default: 10)
+        :param border
+            Modules of border (default: 4)
+    """
+    return _cached_qr_matrix(
+        kwargs.get("data"),
+        kwargs.get("version"),
+        kwargs.get("ecc", ERROR_CORRECT_M),
+        kwargs.get("box_size", 10),
+        kwargs.get("border", 4),
+    )
 
 
 def make_qr_code(**kwargs) -> str:
     """
-    Builds the ascii data to QR code
+    Builds the ascii data to QR code. The most recent
+    ones are kept in a bounded LRU cache
 
     Kwargs:
     -------
@@ -46,12 +111,7 @@ def make_qr_code(**kwargs) -> str:
         :param verbose
             Apply verbose or not
     """
-    qr_data = kwargs.get("data")
-    qr_code = QRCode()
-    qr_code.add_data(qr_data)
-    qr_string = StringIO()
-    qr_code.print_ascii(out=qr_string, invert=True)
-    return qr_string.getvalue()
+    return _cached_qr_ascii(kwargs.get("data"))
 
 
 def make_qr_code_image(**kwargs) -> str:
@@ -70,3 +130,53 @@ def make_qr_code_image(**kwargs) -> str:
     qr_code.add_data(qr_data)
     qr_image = qr_code.make_image()
     return qr_image
+
+
+def _module_lookup(value) -> bytes:
+    """
+    Translation table that maps a light module (0)
+    to :data:`value` and a dark module (1) to black
+    """
+    return bytes([value, 0]) + bytes(254)
+
+
+def make_qr_texture_buffer(**kwargs) -> bytes:
+    """
+    Builds the pixel buffer of a QR code matrix,
+    one pixel per module, to be blitted in a texture.
+
+    The matrix is packed once as one byte per module and mapped to
+    pixels with :meth:`bytes.translate`, so no python loop runs
+    per module. With 'rgb' each channel is written in a single
+    strided slice assignment.
+
+    Kwargs:
+    -------
+        :param matrix
+            The QR code matrix, as given by :func:`make_qr_matrix`
+            or `QRCode.get_matrix`
+        :param color
+            The (r, g, b) color of light modules, from 0 to 255
+        :param colorfmt
+            'rgb' (default) or 'luminance', a single channel
+            buffer 3x smaller than 'rgb'
+    """
+    matrix = kwargs.get("matrix")
+    color = kwargs.get("color")
+    colorfmt = kwargs.get("colorfmt") or "rgb"
+
+    # 1 for dark modules, 0 for light ones
+    modules = b"".join(bytes(row) for row in matrix)
+
+    if colorfmt == "luminance":
+        # ITU-R BT.601 luma
+        luma = round(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])
+        return modules.translate(_module_lookup(luma))
+
+    if colorfmt == "rgb":
+        buff = bytearray(len(modules) * 3)
+        for channel, value in enumerate(color[:3]):
+            buff[channel::3] = modules.translate(_module_lookup(value))
+        return bytes(buff)
+
+    raise ValueError(f"Invalid colorfmt '{colorfmt}'")